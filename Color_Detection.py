@@ -1,68 +1,205 @@
 import cv2
 import numpy as np
 
+from frame_pipeline import FramePipeline
+
+# Rentang HSV tiap warna (OpenCV: H 0-179, S 0-255, V 0-255).
+# Urutan menentukan prioritas jika ada rentang yang tumpang tindih.
+COLORS = {
+    'Merah': ([0, 70, 50], [10, 255, 255]),
+    'Kuning': ([20, 100, 100], [30, 255, 255]),
+    'Hijau': ([40, 40, 40], [80, 255, 255]),
+    'Biru': ([90, 50, 50], [130, 255, 255]),
+    'Putih': ([0, 0, 200], [180, 25, 255]),
+    'Hitam': ([0, 0, 0], [180, 255, 30])
+}
+
+UNKNOWN = "Tidak Dikenal"
+MIN_AREA = 500
+# "center" = piksel tengah bbox (perilaku lama), "mean"/"median" = seluruh mask region
+SCORE_MODE = "mean"
+_KERNEL = np.ones((3, 3), np.uint8)
+
+
+class ColorTable:
+    """Array bounds/center/max_dist untuk semua warna, dipakai scoring batch."""
+
+    def __init__(self, colors=None):
+        colors = COLORS if colors is None else colors
+        self.names = list(colors.keys())
+        self.lower = np.array([lo for lo, _ in colors.values()], dtype=np.int32).reshape(-1, 3)
+        self.upper = np.array([hi for _, hi in colors.values()], dtype=np.int32).reshape(-1, 3)
+        self.center = (self.lower + self.upper) / 2
+        self.max_dist = np.linalg.norm(self.upper - self.lower, axis=1) / 2
+
+    def match(self, hsv_pixels):
+        """Index warna pertama yang memuat tiap piksel (N,), -1 jika tidak ada."""
+        p = np.asarray(hsv_pixels).reshape(-1, 1, 3)
+        inside = np.all((p >= self.lower) & (p <= self.upper), axis=2)
+        idx = np.argmax(inside, axis=1)
+        idx[~inside.any(axis=1)] = -1
+        return idx
+
+    def accuracy(self, hsv_pixels, idx):
+        """Akurasi (0-100) tiap piksel terhadap warna idx; 0 untuk idx -1."""
+        p = np.asarray(hsv_pixels, dtype=np.float64).reshape(-1, 3)
+        known = idx >= 0
+        k = np.where(known, idx, 0)
+        dist = np.linalg.norm(p - self.center[k], axis=1)
+        acc = np.maximum(0, 100 - dist / self.max_dist[k] * 100)
+        return np.where(known, np.round(acc, 1), 0.0)
+
+
+_TABLE = ColorTable()
+
+
+def detect_colors(hsv_pixels, table=None):
+    """
+    Versi batch dari detect_color untuk N piksel HSV (array N x 3).
+
+    Return (names, accuracies, lowers, uppers): list nama, array akurasi (N,),
+    dan batas bawah/atas (N, 3); baris warna tidak dikenal berisi -1.
+    """
+    table = _TABLE if table is None else table
+    idx = table.match(hsv_pixels)
+    acc = table.accuracy(hsv_pixels, idx)
+    known = (idx >= 0)[:, None]
+    lowers = np.where(known, table.lower[idx], -1)
+    uppers = np.where(known, table.upper[idx], -1)
+    names = [table.names[i] if i >= 0 else UNKNOWN for i in idx]
+    return names, acc, lowers, uppers
+
+
 # Fungsi untuk mendeteksi warna dan akurasi
 def detect_color(hsv_pixel):
-    colors = {
-        'Merah': ([0, 70, 50], [10, 255, 255]),
-        'Kuning': ([20, 100, 100], [30, 255, 255]),
-        'Hijau': ([40, 40, 40], [80, 255, 255]),
-        'Biru': ([90, 50, 50], [130, 255, 255]),
-        'Putih': ([0, 0, 200], [180, 25, 255]),
-        'Hitam': ([0, 0, 0], [180, 255, 30])
-    }
-
-    for name, (lower, upper) in colors.items():
-        lower_np = np.array(lower)
-        upper_np = np.array(upper)
-        if np.all(hsv_pixel >= lower_np) and np.all(hsv_pixel <= upper_np):
-            center = (lower_np + upper_np) / 2
-            dist = np.linalg.norm(hsv_pixel - center)
-            max_dist = np.linalg.norm(upper_np - lower_np) / 2
-            accuracy = max(0, 100 - (dist / max_dist * 100))
-            return name, round(accuracy, 1), lower_np, upper_np
-    return "Tidak Dikenal", 0, None, None
-
-cap = cv2.VideoCapture(0)
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-    # Loop semua warna yang didefinisikan
-    for color_name, (lower, upper) in {
-        'Merah': ([0, 70, 50], [10, 255, 255]),
-        'Kuning': ([20, 100, 100], [30, 255, 255]),
-        'Hijau': ([40, 40, 40], [80, 255, 255]),
-        'Biru': ([90, 50, 50], [130, 255, 255]),
-        'Putih': ([0, 0, 200], [180, 25, 255]),
-        'Hitam': ([0, 0, 0], [180, 255, 30])
-    }.items():
-        lower_np = np.array(lower)
-        upper_np = np.array(upper)
-        mask = cv2.inRange(hsv_frame, lower_np, upper_np)
-
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        for contour in contours:
-            if cv2.contourArea(contour) > 500:
-                x, y, w, h = cv2.boundingRect(contour)
-                # Ambil warna di tengah bounding box untuk akurasi
-                hsv_pixel = hsv_frame[y + h // 2, x + w // 2]
-                _, accuracy, _, _ = detect_color(hsv_pixel)
-
-                # Gambar kotak dan teks
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, f"{color_name} - {accuracy}%", (x, y - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-
-    cv2.imshow('Color Object Detection', frame)
-
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+    names, acc, lowers, uppers = detect_colors(np.asarray(hsv_pixel).reshape(1, 3))
+    if names[0] == UNKNOWN:
+        return UNKNOWN, 0, None, None
+    return names[0], float(acc[0]), lowers[0], uppers[0]
+
+
+class ColorClassifier:
+    """
+    Klasifikasi warna satu kali jalan (single pass) dengan lookup table HSV.
+
+    Semua rentang warna di-compile sekali menjadi LUT uint8 berukuran
+    180x256x256 (label 0 = tidak dikenal, label i+1 = warna ke-i). Tiap frame
+    cukup satu kali indexing LUT untuk mendapat label map, lalu satu kali
+    connected components untuk semua warna sekaligus, sehingga biaya per frame
+    tidak bertambah dengan jumlah warna.
+    """
+
+    def __init__(self, colors=None):
+        colors = COLORS if colors is None else colors
+        if len(colors) > 255:
+            raise ValueError("Maksimal 255 warna untuk LUT uint8")
+        self.table = ColorTable(colors)
+        self.names = self.table.names
+        self.lut = self._build_lut()
+        self._flat_lut = self.lut.ravel()
+
+    def _build_lut(self):
+        lut = np.zeros((180, 256, 256), dtype=np.uint8)
+        for label, (lower, upper) in enumerate(zip(self.table.lower, self.table.upper), start=1):
+            h0, s0, v0 = np.clip(lower, 0, [179, 255, 255])
+            h1, s1, v1 = np.clip(upper, 0, [179, 255, 255])
+            region = lut[h0:h1 + 1, s0:s1 + 1, v0:v1 + 1]
+            # warna yang didefinisikan lebih dulu tetap menang (sama seperti detect_color)
+            region[region == 0] = label
+        return lut
+
+    def classify(self, hsv_frame):
+        """Label map (HxW uint8) untuk frame HSV, satu kali lookup."""
+        h, s, v = cv2.split(hsv_frame)
+        idx = h.astype(np.int32)
+        idx <<= 8
+        idx |= s
+        idx <<= 8
+        idx |= v
+        return self._flat_lut.take(idx)
+
+    def _components(self, labels):
+        # label - 1 (uint8 wrap): background jadi 255 supaya tidak ikut di erode (min)
+        shifted = labels - np.uint8(1)
+        pure_hi = cv2.compare(cv2.dilate(labels, _KERNEL), labels, cv2.CMP_EQ)
+        pure_lo = cv2.compare(cv2.erode(shifted, _KERNEL), shifted, cv2.CMP_EQ)
+        mask = cv2.bitwise_and(cv2.bitwise_and(pure_hi, pure_lo),
+                               cv2.compare(labels, 0, cv2.CMP_GT))
+        _, cc, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8)
+        return cc, stats
+
+    def _regions(self, labels, min_area):
+        cc, stats = self._components(labels)
+        found = []
+        for i in np.nonzero(stats[1:, cv2.CC_STAT_AREA] > min_area)[0] + 1:
+            x, y, w, h, area = map(int, stats[i, :5])
+            # baris paling atas komponen pasti memuat piksel komponen tsb
+            j = int(np.argmax(cc[y, x:x + w] == i))
+            found.append((int(labels[y, x + j]), x, y, w, h, area, int(i)))
+        return cc, found
+
+    def regions(self, labels, min_area=MIN_AREA):
+        """
+        Cari region per warna dari label map dengan satu pass connected components.
+
+        Piksel yang bertetangga (8 arah) dengan piksel berlabel lain diputus,
+        jadi setiap komponen selalu berisi satu label saja.
+        Return list (label, x, y, w, h, area).
+        """
+        _, found = self._regions(labels, min_area)
+        return [r[:6] for r in found]
+
+    def score_regions(self, hsv_frame, labels, min_area=MIN_AREA, mode=SCORE_MODE):
+        """
+        Region + akurasi untuk semua region dalam satu panggilan batch.
+
+        mode "center" memakai piksel tengah bbox, "mean"/"median" memakai
+        agregat HSV seluruh piksel di mask region (lebih stabil, tidak flicker).
+        Return list (name, accuracy, (x, y, w, h)).
+        """
+        cc, found = self._regions(labels, min_area)
+        if not found:
+            return []
+        pixels = np.empty((len(found), 3), dtype=np.float64)
+        for n, (_, x, y, w, h, _, i) in enumerate(found):
+            if mode == "center":
+                pixels[n] = hsv_frame[y + h // 2, x + w // 2]
+                continue
+            roi = hsv_frame[y:y + h, x:x + w]
+            roi_mask = cc[y:y + h, x:x + w] == i
+            if mode == "median":
+                pixels[n] = np.median(roi[roi_mask], axis=0)
+            else:
+                pixels[n] = cv2.mean(roi, mask=roi_mask.view(np.uint8))[:3]
+
+        if mode == "center":
+            # perilaku lama: akurasi dari warna apa pun yang memuat piksel tengah
+            idx = self.table.match(pixels)
+        else:
+            idx = np.array([label - 1 for label, *_ in found])
+        acc = self.table.accuracy(pixels, idx)
+        return [(self.names[label - 1], float(a), (x, y, w, h))
+                for (label, x, y, w, h, *_), a in zip(found, acc)]
+
+
+def main(camera_index=0, score_mode=SCORE_MODE):
+    classifier = ColorClassifier()
+
+    def process(frame):
+        hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        # Satu label map untuk semua warna, lalu region + akurasi per label
+        labels = classifier.classify(hsv_frame)
+        return classifier.score_regions(hsv_frame, labels, mode=score_mode)
+
+    def render(frame, regions):
+        for color_name, accuracy, (x, y, w, h) in regions:
+            # Gambar kotak dan teks
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            cv2.putText(frame, f"{color_name} - {accuracy}%", (x, y - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+        return frame
+
+    FramePipeline(camera_index, process, render, window_name='Color Object Detection').run()
+
+if __name__ == "__main__":
+    main(camera_index=0)
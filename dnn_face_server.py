@@ -0,0 +1,241 @@
+"""
+Server deteksi wajah DNN (res10 SSD) untuk banyak kamera sekaligus.
+
+Frame dari N sumber (index kamera, file video, atau folder gambar) dikumpulkan
+menjadi satu batch per tick, diproses dengan satu cv2.dnn.blobFromImages +
+satu net.forward(), lalu hasil deteksi dipisah lagi per sumber berdasarkan
+kolom image_id (kolom 0) pada output DetectionOutput.
+
+Jalankan:
+    python dnn_face_server.py 0 1 rekaman.mp4 folder_gambar/ --batch-size 8 --max-wait 0.02
+"""
+import argparse
+import os
+import threading
+import time
+
+import cv2
+
+import model_registry as registry
+from realtime_webcam_cv import postprocess_detections
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+BLOB_SIZE = (300, 300)
+BLOB_MEAN = (104.0, 177.0, 123.0)
+
+
+class ImageDirCapture:
+    """Folder gambar dengan antarmuka mirip cv2.VideoCapture (read/isOpened/release)."""
+
+    def __init__(self, path):
+        self.files = sorted(os.path.join(path, f) for f in os.listdir(path)
+                            if f.lower().endswith(IMAGE_EXTS))
+        self._i = 0
+
+    def isOpened(self):
+        return bool(self.files)
+
+    def read(self):
+        while self._i < len(self.files):
+            frame = cv2.imread(self.files[self._i])
+            self._i += 1
+            if frame is not None:
+                return True, frame
+        return False, None
+
+    def release(self):
+        self._i = len(self.files)
+
+
+def open_source(spec):
+    """
+    Buka sumber frame. Return (capture, live).
+
+    live=True (kamera): frame lama boleh dibuang supaya selalu terbaru.
+    live=False (video/folder): tidak ada frame yang dibuang.
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return cv2.VideoCapture(int(spec)), True
+    if os.path.isdir(spec):
+        return ImageDirCapture(spec), False
+    return cv2.VideoCapture(spec), False
+
+
+class SourceReader(threading.Thread):
+    """Thread pembaca satu sumber; menaruh frame ke slot miliknya di server."""
+
+    def __init__(self, server, source_id, cap, live):
+        super().__init__(daemon=True)
+        self.server = server
+        self.source_id = source_id
+        self.cap = cap
+        self.live = live
+        self.seq = 0
+        self.done = False
+
+    def run(self):
+        while not self.server.stopped:
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            self.server._offer(self, frame)
+            self.seq += 1
+        self.cap.release()
+        self.server._finish(self)
+
+
+class FaceDetectionServer:
+    """
+    Gabungkan frame dari banyak sumber menjadi batch untuk satu forward pass.
+
+    batch_size : jumlah frame maksimum per forward
+    max_wait   : detik maksimum menunggu batch penuh setelah frame pertama masuk
+    conf       : ambang confidence deteksi
+    nms        : ambang IoU untuk NMS (None = tanpa NMS)
+    """
+
+    def __init__(self, sources, net=None, batch_size=8, max_wait=0.02, conf=0.5, nms=0.4):
+        self.net = net if net is not None else registry.res10_net()
+        self.batch_size = max(1, int(batch_size))
+        self.max_wait = max_wait
+        self.conf = conf
+        self.nms = nms
+        self.stopped = False
+        self._cond = threading.Condition()
+        self._pending = {}  # source_id -> (seq, t_capture, frame)
+        self._rr = 0        # offset round-robin supaya adil antar sumber
+        self.readers = []
+        self.names = []
+        self.dropped = 0
+        self.batches = 0
+        self.frames = 0
+        self.forward_s = 0.0
+
+        for spec in sources:
+            cap, live = open_source(spec)
+            if not cap.isOpened():
+                print(f"[WARN] Sumber tidak bisa dibuka: {spec}")
+                continue
+            self.names.append(str(spec))
+            self.readers.append(SourceReader(self, len(self.readers), cap, live))
+
+    # --- dipanggil dari thread reader ---
+    def _offer(self, reader, frame):
+        with self._cond:
+            if reader.source_id in self._pending:
+                if reader.live:
+                    self.dropped += 1
+                else:
+                    # sumber offline: tunggu slot kosong (backpressure), jangan buang frame
+                    self._cond.wait_for(lambda: reader.source_id not in self._pending or self.stopped)
+            self._pending[reader.source_id] = (reader.seq, time.perf_counter(), frame)
+            self._cond.notify_all()
+
+    def _finish(self, reader):
+        with self._cond:
+            reader.done = True
+            self._cond.notify_all()
+
+    def _active(self):
+        return sum(not r.done for r in self.readers)
+
+    def next_batch(self):
+        """Ambil batch berikutnya: list (source_id, seq, t_capture, frame). [] jika semua selesai."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or self._active() == 0 or self.stopped)
+            if not self._pending:
+                return []
+            deadline = time.perf_counter() + self.max_wait
+            while not self.stopped:
+                target = min(self.batch_size, self._active()) or 1
+                remaining = deadline - time.perf_counter()
+                if len(self._pending) >= target or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            n = len(self.readers)
+            order = sorted(self._pending, key=lambda sid: (sid - self._rr) % n)[:self.batch_size]
+            self._rr = (self._rr + 1) % n
+            batch = [(sid, *self._pending.pop(sid)) for sid in order]
+            self._cond.notify_all()
+            return batch
+
+    def detect_batch(self, frames):
+        """Satu forward untuk semua frame; return array DETECTION_DTYPE per frame."""
+        blob = cv2.dnn.blobFromImages([cv2.resize(f, BLOB_SIZE) for f in frames], 1.0,
+                                      BLOB_SIZE, BLOB_MEAN)
+        t0 = time.perf_counter()
+        self.net.setInput(blob)
+        out = self.net.forward()
+        self.forward_s += time.perf_counter() - t0
+
+        out = out.reshape(-1, 7)
+        out = out[out[:, 2] > self.conf]
+        return [postprocess_detections(out, f.shape[1], f.shape[0], conf=self.conf,
+                                       nms=self.nms, image_id=i)
+                for i, f in enumerate(frames)]
+
+    def serve(self, on_result):
+        """
+        Loop utama: on_result(source_name, seq, frame, detections) dipanggil
+        per frame. Berhenti jika semua sumber habis atau on_result return False.
+        """
+        for r in self.readers:
+            r.start()
+        t_start = time.perf_counter()
+        try:
+            while not self.stopped:
+                batch = self.next_batch()
+                if not batch:
+                    break
+                dets = self.detect_batch([item[3] for item in batch])
+                self.batches += 1
+                self.frames += len(batch)
+                for (sid, seq, _, frame), d in zip(batch, dets):
+                    if on_result(self.names[sid], seq, frame, d) is False:
+                        self.stop()
+                        break
+        finally:
+            self.stop()
+            elapsed = time.perf_counter() - t_start
+            print(f"[INFO] {self.frames} frame / {self.batches} batch "
+                  f"(rata-rata {self.frames / max(1, self.batches):.1f} per batch), "
+                  f"{self.frames / max(elapsed, 1e-9):.1f} FPS total, "
+                  f"forward {1000 * self.forward_s / max(1, self.batches):.1f} ms/batch, "
+                  f"dropped {self.dropped}")
+
+    def stop(self):
+        with self._cond:
+            self.stopped = True
+            self._cond.notify_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched multi-camera DNN face detection")
+    parser.add_argument("sources", nargs="+", help="index kamera, file video, atau folder gambar")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-wait", type=float, default=0.02, help="detik menunggu batch penuh")
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--nms", type=float, default=0.4)
+    parser.add_argument("--show", action="store_true", help="tampilkan window per sumber")
+    args = parser.parse_args()
+
+    server = FaceDetectionServer(args.sources, batch_size=args.batch_size,
+                                 max_wait=args.max_wait, conf=args.conf, nms=args.nms)
+
+    def on_result(name, seq, frame, dets):
+        if not args.show:
+            print(f"[{name}] frame {seq}: {len(dets)} wajah")
+            return True
+        for (x1, y1, x2, y2), conf in dets:
+            cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(frame, f"{conf*100:.2f}%", (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 0), 2)
+        cv2.imshow(f"Face DNN [{name}]", frame)
+        return (cv2.waitKey(1) & 0xFF) != ord("q")
+
+    server.serve(on_result)
+    cv2.destroyAllWindows()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Pipeline webcam bertingkat: capture -> process -> render.
+
+- Thread capture terus membaca kamera dan hanya menyimpan frame terbaru
+  (ring buffer drop-oldest), jadi frame basi tidak menumpuk di buffer driver.
+- Thread process menjalankan fungsi per-frame (deteksi / inferensi model)
+  selalu pada frame terbaru yang tersedia.
+- Render berjalan di main thread (cv2.imshow harus di main thread) dan
+  menampilkan frame yang sudah diproses beserta hasilnya.
+
+Latency tiap stage dan jumlah frame yang di-drop dicatat di PipelineStats.
+
+Contoh:
+    def process(frame):
+        return detect(frame)
+
+    def render(frame, result):
+        draw(frame, result)
+        return frame
+
+    FramePipeline(0, process, render, window_name="Demo").run()
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class LatestFrameBuffer:
+    """Ring buffer kecil thread-safe; jika penuh, item paling lama dibuang."""
+
+    def __init__(self, maxlen=1):
+        self._items = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Ambil item paling baru (sisanya dibuang). None jika timeout."""
+        with self._cond:
+            if not self._items and not self._cond.wait_for(lambda: self._items, timeout):
+                return None
+            item = self._items.pop()
+            self.dropped += len(self._items)
+            self._items.clear()
+            return item
+
+
+class StageStats:
+    """Latency (ms, EMA), laju (FPS, EMA) dan jumlah item untuk satu stage."""
+
+    def __init__(self, alpha=0.1):
+        self.alpha = alpha
+        self.latency_ms = 0.0
+        self.interval_ms = 0.0
+        self.count = 0
+        self._last_t = None
+
+    def _ema(self, old, new):
+        return new if old == 0.0 else (1 - self.alpha) * old + self.alpha * new
+
+    def add(self, seconds):
+        now = time.perf_counter()
+        self.latency_ms = self._ema(self.latency_ms, seconds * 1000.0)
+        if self._last_t is not None:
+            self.interval_ms = self._ema(self.interval_ms, (now - self._last_t) * 1000.0)
+        self._last_t = now
+        self.count += 1
+
+    @property
+    def fps(self):
+        return 1000.0 / self.interval_ms if self.interval_ms > 0 else 0.0
+
+
+class PipelineStats:
+    def __init__(self):
+        self.capture = StageStats()
+        self.process = StageStats()
+        self.render = StageStats()
+        self.glass = StageStats()  # waktu frame ditangkap -> tampil di layar
+        self.dropped_capture = 0   # frame kamera yang tidak sempat diproses
+        self.dropped_render = 0    # hasil proses yang tidak sempat ditampilkan
+
+    def fps(self, stage="render"):
+        return getattr(self, stage).fps
+
+    def summary(self):
+        return (f"capture {self.capture.latency_ms:.1f}ms | process {self.process.latency_ms:.1f}ms | "
+                f"render {self.render.latency_ms:.1f}ms | glass-to-glass {self.glass.latency_ms:.1f}ms | "
+                f"dropped cap={self.dropped_capture} out={self.dropped_render}")
+
+
+def draw_stats(frame, stats, origin=(10, 25)):
+    """Overlay latency/drop ringkas di pojok frame."""
+    x, y = origin
+    lines = [
+        f"proc {stats.process.latency_ms:.0f}ms  g2g {stats.glass.latency_ms:.0f}ms  FPS {stats.fps():.1f}",
+        f"drop cap {stats.dropped_capture}  out {stats.dropped_render}",
+    ]
+    for i, line in enumerate(lines):
+        cv2.putText(frame, line, (x, y + i * 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 255), 1)
+    return frame
+
+
+class AsyncWorker:
+    """
+    Jalankan fn(item) -> result di thread sendiri, selalu pada item terbaru.
+
+    Dipakai untuk model yang jauh lebih lambat dari kamera: submit() tidak
+    pernah blok, item yang belum sempat diproses ditimpa item baru, dan
+    on_result(item, result) dipanggil dari thread worker begitu hasil siap.
+    Laju inferensi otomatis mengikuti kecepatan model (tanpa frame stride).
+    """
+
+    def __init__(self, fn, on_result=None):
+        self.fn = fn
+        self.on_result = on_result
+        self.stats = StageStats()
+        self._items = LatestFrameBuffer(1)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def dropped(self):
+        return self._items.dropped
+
+    def submit(self, item):
+        self._items.put(item)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            item = self._items.get(timeout=0.1)
+            if item is None:
+                continue
+            t0 = time.perf_counter()
+            try:
+                result = self.fn(item)
+            except Exception as e:
+                print(f"[WARN] AsyncWorker: {e}")
+                continue
+            finally:
+                self.stats.add(time.perf_counter() - t0)
+            if self.on_result is not None:
+                self.on_result(item, result)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+
+class FramePipeline:
+    """
+    Jalankan process(frame) -> result di thread terpisah dari capture dan render.
+
+    source      : index kamera, path video, atau cv2.VideoCapture yang sudah dibuka
+    process     : fungsi(frame) -> result, dipanggil di thread process
+    render      : fungsi(frame, result) -> frame untuk ditampilkan (default: frame apa adanya)
+    on_key      : fungsi(key) -> False untuk berhenti; default berhenti saat 'q'
+    buffer_size : kapasitas ring buffer capture (1 = selalu frame terbaru)
+    """
+
+    def __init__(self, source, process, render=None, window_name="Pipeline",
+                 on_key=None, buffer_size=1, show_stats=False):
+        self.cap = source if isinstance(source, cv2.VideoCapture) else cv2.VideoCapture(source)
+        self.process = process
+        self.render = render
+        self.window_name = window_name
+        self.on_key = on_key
+        self.show_stats = show_stats
+        self.stats = PipelineStats()
+        self._frames = LatestFrameBuffer(buffer_size)
+        self._results = LatestFrameBuffer(1)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def is_opened(self):
+        return self.cap.isOpened()
+
+    def _capture_loop(self):
+        seq = 0
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                print("[ERROR] Gagal membaca frame dari kamera")
+                self._stop.set()
+                break
+            t1 = time.perf_counter()
+            self.stats.capture.add(t1 - t0)
+            self._frames.put((seq, t1, frame))
+            seq += 1
+
+    def _process_loop(self):
+        while not self._stop.is_set():
+            item = self._frames.get(timeout=0.1)
+            if item is None:
+                continue
+            seq, t_cap, frame = item
+            t0 = time.perf_counter()
+            try:
+                result = self.process(frame)
+            except Exception as e:
+                # satu frame gagal tidak boleh mematikan thread process (render akan beku)
+                print(f"[WARN] FramePipeline: process gagal, frame {seq} dilewati: {e}")
+                continue
+            finally:
+                self.stats.process.add(time.perf_counter() - t0)
+            self._results.put((seq, t_cap, frame, result))
+
+    def start(self):
+        for target in (self._capture_loop, self._process_loop):
+            t = threading.Thread(target=target, daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=2.0)
+        self._threads = []
+        self.cap.release()
+        cv2.destroyAllWindows()
+
+    def run(self):
+        """Loop render di main thread sampai 'q' / on_key False / kamera habis."""
+        self.start()
+        try:
+            while not self._stop.is_set():
+                item = self._results.get(timeout=0.05)
+                if item is not None:
+                    _, t_cap, frame, result = item
+                    t0 = time.perf_counter()
+                    display = self.render(frame, result) if self.render else frame
+                    if display is None:
+                        display = frame
+                    if self.show_stats:
+                        draw_stats(display, self.stats)
+                    cv2.imshow(self.window_name, display)
+                    t1 = time.perf_counter()
+                    self.stats.render.add(t1 - t0)
+                    self.stats.glass.add(t1 - t_cap)
+                    self.stats.dropped_capture = self._frames.dropped
+                    self.stats.dropped_render = self._results.dropped
+
+                key = cv2.waitKey(1) & 0xFF
+                if key == 255:
+                    continue
+                if self.on_key is not None:
+                    if self.on_key(key) is False:
+                        break
+                elif key == ord('q'):
+                    break
+        finally:
+            self.stop()
+            print(f"[INFO] Pipeline: {self.stats.summary()}")
+        return self.stats
@@ -3,12 +3,14 @@
 # Perbaikan terakhir: tambahkan skor khusus untuk setiap 5-in-a-row window
 # (setiap window 5 berurutan pada garis memberi 1 poin pada pemain yang memilikinya).
 # Triple (3-in-row) skor tetap terpisah. Semua window distinct dihitung.
-# Jalankan: python xox_16x16_gui_ai.py
+# Jalankan: python xox_16x16_gui_ai.py  (--workers N: AI search paralel di N proses)
 
 import pygame
 import sys
 import random
-from itertools import product
+
+from xox_engine import XoxBoard, player_of
+from xox_ai import AIWorker
 
 # --- konfigurasi ---
 SIZE = 16        # ukuran papan (16x16)
@@ -43,26 +45,10 @@ WHITE = (255,255,255)
 HIGHLIGHT_X = (100,170,255,140)
 HIGHLIGHT_O = (255,150,150,140)
 
-pygame.init()
-# fonts
-try:
-    font = pygame.font.SysFont('Segoe UI', 16)
-    big_font = pygame.font.SysFont('Segoe UI', 24)
-except:
-    font = pygame.font.SysFont(None, 16)
-    big_font = pygame.font.SysFont(None, 24)
-
-screen = pygame.display.set_mode((WIN_W, WIN_H))
-pygame.display.set_caption("XOX 16x16 — Modern GUI + AI + 5-in-row scoring")
-clock = pygame.time.Clock()
-
-# papan: matrix SIZE x SIZE, values: '.', 'X', 'O'
+# papan: bitboard + tabel run-length (xox_engine), board.get(r, c) -> '.', 'X', 'O'
 EMPTY = '.'
 
-def create_board():
-    return [[EMPTY for _ in range(SIZE)] for __ in range(SIZE)]
-
-board = create_board()
+board = XoxBoard(SIZE, WIN_LEN)
 turn_X = True   # True = X, False = O
 
 # score tracking: count distinct triples per player and count distinct fives per player
@@ -70,14 +56,12 @@ score_triple_X = 0
 score_triple_O = 0
 score_five_X = 0
 score_five_O = 0
-tracked_triples_X = set()
-tracked_triples_O = set()
-tracked_fives_X = set()
-tracked_fives_O = set()
 
 # track first 5-in-row occurrence for info
 first_five_symbol = None
 first_five_cells = []
+# semua window 5-in-row per simbol, ditambah inkremental di place_move (untuk highlight)
+five_windows = {'X': [], 'O': []}
 
 # UI elements
 restart_rect = pygame.Rect(MARGIN, GRID_H + MARGIN*2 + 14, 140, 40)
@@ -93,194 +77,170 @@ ai_difficulty = 'hard'  # 'easy' or 'hard'
 # AI timing
 ai_think_delay = 350
 ai_timer = 0
+# 'hard': search alpha-beta di thread AIWorker (budget waktu = ai_think_delay), ponder
+# saat giliran manusia; loop GUI hanya poll hasil, tidak pernah menunggu search.
+# Dibuat di __main__ (--workers N: search paralel root-split di N proses).
+ai_worker = None
+ai_request = None    # board.count() saat job think/ponder terakhir dimulai
+ai_status = None     # hasil terbaru worker (best-so-far) untuk panel info
 
 # helper: draw rounded rect
 def draw_round_rect(surface, rect, color, radius=8, width=0):
     pygame.draw.rect(surface, color, rect, border_radius=radius, width=width)
 
 # background gradient
-def draw_gradient_background():
+def draw_gradient_background(surface):
     for i in range(WIN_H):
         t = i / WIN_H
         r = int(BG_TOP[0] * (1-t) + BG_BOTTOM[0] * t)
         g = int(BG_TOP[1] * (1-t) + BG_BOTTOM[1] * t)
         b = int(BG_TOP[2] * (1-t) + BG_BOTTOM[2] * t)
-        pygame.draw.line(screen, (r,g,b), (0,i), (WIN_W,i))
+        pygame.draw.line(surface, (r,g,b), (0,i), (WIN_W,i))
 
 # draw board panel and grid
-def draw_board_panel():
+def draw_board_panel(surface):
     panel = pygame.Rect(MARGIN-6, MARGIN-6, GRID_W+12, GRID_H+12)
-    draw_round_rect(screen, panel, WHITE, radius=12)
+    draw_round_rect(surface, panel, WHITE, radius=12)
     inner = pygame.Rect(MARGIN, MARGIN, GRID_W, GRID_H)
-    pygame.draw.rect(screen, BOARD_BG, inner, border_radius=8)
+    pygame.draw.rect(surface, BOARD_BG, inner, border_radius=8)
     for i in range(1, SIZE):
         x = MARGIN + i * CELL
-        pygame.draw.line(screen, LINE_COL, (x, MARGIN+6), (x, MARGIN + GRID_H-6), 1)
+        pygame.draw.line(surface, LINE_COL, (x, MARGIN+6), (x, MARGIN + GRID_H-6), 1)
     for i in range(1, SIZE):
         y = MARGIN + i * CELL
-        pygame.draw.line(screen, LINE_COL, (MARGIN+6, y), (MARGIN + GRID_W-6, y), 1)
+        pygame.draw.line(surface, LINE_COL, (MARGIN+6, y), (MARGIN + GRID_W-6, y), 1)
 
 # draw X/O pieces
 shadow_offset = 2
 
-def draw_pieces():
-    for r in range(SIZE):
-        for c in range(SIZE):
-            val = board[r][c]
-            if val == EMPTY:
-                continue
-            cx = MARGIN + c * CELL + CELL // 2
-            cy = MARGIN + r * CELL + CELL // 2
-            if val == 'X':
-                offset = int(CELL*0.32)
-                pygame.draw.line(screen, (0,0,0,30), (cx - offset + shadow_offset, cy - offset + shadow_offset), (cx + offset + shadow_offset, cy + offset + shadow_offset), 4)
-                pygame.draw.line(screen, (0,0,0,30), (cx - offset + shadow_offset, cy + offset + shadow_offset), (cx + offset + shadow_offset, cy - offset + shadow_offset), 4)
-                pygame.draw.line(screen, X_COL, (cx - offset, cy - offset), (cx + offset, cy + offset), 4)
-                pygame.draw.line(screen, X_COL, (cx - offset, cy + offset), (cx + offset, cy - offset), 4)
-            else:
-                radius = int(CELL*0.36)
-                pygame.draw.circle(screen, (0,0,0,30), (cx+shadow_offset, cy+shadow_offset), radius, 0)
-                pygame.draw.circle(screen, O_COL, (cx, cy), radius, 4)
+def draw_pieces(surface):
+    for i in board.history:
+        r, c = board.rc(i)
+        val = board.get(r, c)
+        cx = MARGIN + c * CELL + CELL // 2
+        cy = MARGIN + r * CELL + CELL // 2
+        if val == 'X':
+            offset = int(CELL*0.32)
+            pygame.draw.line(surface, (0,0,0,30), (cx - offset + shadow_offset, cy - offset + shadow_offset), (cx + offset + shadow_offset, cy + offset + shadow_offset), 4)
+            pygame.draw.line(surface, (0,0,0,30), (cx - offset + shadow_offset, cy + offset + shadow_offset), (cx + offset + shadow_offset, cy - offset + shadow_offset), 4)
+            pygame.draw.line(surface, X_COL, (cx - offset, cy - offset), (cx + offset, cy + offset), 4)
+            pygame.draw.line(surface, X_COL, (cx - offset, cy + offset), (cx + offset, cy - offset), 4)
+        else:
+            radius = int(CELL*0.36)
+            pygame.draw.circle(surface, (0,0,0,30), (cx+shadow_offset, cy+shadow_offset), radius, 0)
+            pygame.draw.circle(surface, O_COL, (cx, cy), radius, 4)
+
+# tile transparan satu sel, dibuat sekali per warna
+_cell_tiles = {}
+
+def cell_tile(color):
+    tile = _cell_tiles.get(color)
+    if tile is None:
+        tile = pygame.Surface((CELL, CELL), pygame.SRCALPHA)
+        tile.fill(color)
+        _cell_tiles[color] = tile
+    return tile
 
 # highlight a set of cells (iterable of (r,c))
-def highlight_cells(cells, color=(255,220,120,120)):
+def highlight_cells(surface, cells, color=(255,220,120,120)):
     if not cells:
         return
-    surf = pygame.Surface((CELL, CELL), pygame.SRCALPHA)
-    surf.fill(color)
+    surf = cell_tile(color)
     for (r,c) in cells:
         x = MARGIN + c * CELL
         y = MARGIN + r * CELL
-        screen.blit(surf, (x, y))
+        surface.blit(surf, (x, y))
+
+# --- layer render ---
+# static_layer : gradient + panel papan, dirender sekali
+# board_layer  : static + highlight 5-in-row + bidak, dirender ulang hanya jika board_dirty
+# Frame dikomposisi ulang (board_layer + hover + UI) hanya jika ada yang berubah.
+static_layer = None
+board_layer = None
+board_dirty = True
+frame_key = None
+
+def build_static_layer():
+    surface = pygame.Surface((WIN_W, WIN_H))
+    draw_gradient_background(surface)
+    draw_board_panel(surface)
+    return surface
+
+def rebuild_board_layer():
+    global static_layer, board_layer
+    if static_layer is None:
+        static_layer = build_static_layer()
+    board_layer = static_layer.copy()
+    # highlight O first (red), then X (blue) so X highlight sits on top if overlapping
+    for f in five_windows['O']:
+        highlight_cells(board_layer, f, color=HIGHLIGHT_O)
+    for f in five_windows['X']:
+        highlight_cells(board_layer, f, color=HIGHLIGHT_X)
+    # also highlight first found 5-in-a-row (kept as accent)
+    if first_five_cells:
+        highlight_cells(board_layer, first_five_cells, color=(255,200,120,120))
+    draw_pieces(board_layer)
 
 # scan all distinct contiguous windows of length L for symbol sym
 
 def find_all_windows_of_length(L, sym):
-    found = set()
-    directions = [(1,0),(0,1),(1,1),(1,-1)]
-    for dr,dc in directions:
-        for r in range(SIZE):
-            for c in range(SIZE):
-                cells = []
-                ok = True
-                for i in range(L):
-                    rr = r + i*dr
-                    cc = c + i*dc
-                    if not (0 <= rr < SIZE and 0 <= cc < SIZE):
-                        ok = False
-                        break
-                    if board[rr][cc] != sym:
-                        ok = False
-                        break
-                    cells.append((rr,cc))
-                if ok:
-                    found.add(frozenset(cells))
-    return found
-
-# update scores globally after a move by scanning entire board for triples and fives
-
-def update_scores_global():
+    # AND dari bitboard yang digeser, bukan scan sel per sel
+    return {frozenset(w) for w in board.windows(L, player_of(sym))}
+
+# update scores after a move: hanya window yang melewati (r, c) yang bisa baru,
+# jadi cukup hitung window panjang 3 dan 5 di 4 arah lewat sel itu
+# (cek kesetaraan dengan scan global: python xox_engine.py --check 2000)
+
+def update_scores_at(r, c, sym):
     global score_triple_X, score_triple_O, score_five_X, score_five_O
-    global tracked_triples_X, tracked_triples_O, tracked_fives_X, tracked_fives_O
-    # triples
-    found_X_triples = find_all_windows_of_length(TRIPLE_LEN, 'X')
-    for t in found_X_triples:
-        if t not in tracked_triples_X:
-            tracked_triples_X.add(t)
-            score_triple_X += 1
-    found_O_triples = find_all_windows_of_length(TRIPLE_LEN, 'O')
-    for t in found_O_triples:
-        if t not in tracked_triples_O:
-            tracked_triples_O.add(t)
-            score_triple_O += 1
-    # fives (windows of length WIN_LEN) -> count each distinct window as 1 point
-    found_X_fives = find_all_windows_of_length(WIN_LEN, 'X')
-    for fset in found_X_fives:
-        if fset not in tracked_fives_X:
-            tracked_fives_X.add(fset)
-            score_five_X += 1
-    found_O_fives = find_all_windows_of_length(WIN_LEN, 'O')
-    for fset in found_O_fives:
-        if fset not in tracked_fives_O:
-            tracked_fives_O.add(fset)
-            score_five_O += 1
+    p = player_of(sym)
+    triples = board.count_windows_through(r, c, p, TRIPLE_LEN)
+    fives = board.count_windows_through(r, c, p, WIN_LEN)
+    if sym == 'X':
+        score_triple_X += triples
+        score_five_X += fives
+    else:
+        score_triple_O += triples
+        score_five_O += fives
 
 # immediate five detection for highlighting first occurrence
 
 def check_five_at(r, c, sym):
-    directions = [(1,0),(0,1),(1,1),(1,-1)]
-    for dr,dc in directions:
-        cells = [(r,c)]
-        rr, cc = r+dr, c+dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == sym:
-            cells.append((rr,cc))
-            rr += dr; cc += dc
-        rr, cc = r-dr, c-dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == sym:
-            cells.insert(0,(rr,cc))
-            rr -= dr; cc -= dc
-        if len(cells) >= WIN_LEN:
-            return cells
-    return []
+    return board.check_five_at(r, c, player_of(sym))
 
 # board full check
 
 def board_full():
-    for row in board:
-        for cell in row:
-            if cell == EMPTY:
-                return False
-    return True
+    return board.full()
 
 # AI implementation (immediate win/block + heuristic)
 
 def immediate_win_block(sym):
-    for r,c in product(range(SIZE), range(SIZE)):
-        if board[r][c] != EMPTY:
-            continue
-        board[r][c] = sym
-        cells = check_five_at(r,c,sym)
-        board[r][c] = EMPTY
-        if cells:
+    # run-length tabel: panjang run jika batu diletakkan, tanpa place/undo;
+    # sel yang bisa menang selalu bertetangga dengan batu, jadi cukup frontier
+    p = player_of(sym)
+    for r, c in board.candidates():
+        if board.max_run_if(r, c, p) >= WIN_LEN:
             return (r,c)
     return None
 
 
 def score_position(r, c, sym):
-    score = 0
-    opp = 'X' if sym == 'O' else 'O'
-    directions = [(1,0),(0,1),(1,1),(1,-1)]
-    for dr, dc in directions:
-        count = 1
-        rr, cc = r+dr, c+dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == sym:
-            count += 1
-            rr += dr; cc += dc
-        rr, cc = r-dr, c-dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == sym:
-            count += 1
-            rr -= dr; cc -= dc
-        score += (10 ** (count if count<=6 else 6))
-        opp_count = 0
-        rr, cc = r+dr, c+dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == opp:
-            opp_count += 1
-            rr += dr; cc += dc
-        rr, cc = r-dr, c-dc
-        while 0 <= rr < SIZE and 0 <= cc < SIZE and board[rr][cc] == opp:
-            opp_count += 1
-            rr -= dr; cc -= dc
-        if opp_count >= WIN_LEN-1:
-            score -= 10**6
-    return score
+    # tabel pola (open/closed two..five) dari key yang dijaga board: nilai serang + nilai blok
+    p = player_of(sym)
+    i = board.idx(r, c)
+    return board.cell_value(i, p) + board.cell_value(i, 1 - p)
 
 
 def ai_choose_move(sym, difficulty='hard'):
-    empties = [(r,c) for r in range(SIZE) for c in range(SIZE) if board[r][c] == EMPTY]
-    if not empties:
+    # langsung di thread GUI: 'easy' acak, selain itu heuristik satu langkah
+    # (search 'hard' ada di ai_worker; ini fallback-nya)
+    # kandidat: frontier papan (sel kosong radius 2 dari batu), bukan semua sel kosong
+    candidates = board.candidates()
+    if not candidates:
         return None
     if difficulty == 'easy':
-        return random.choice(empties)
+        return random.choice(candidates)
     win_move = immediate_win_block(sym)
     if win_move:
         return win_move
@@ -290,7 +250,7 @@ def ai_choose_move(sym, difficulty='hard'):
         return block
     best_score = None
     best_moves = []
-    for (r,c) in empties:
+    for (r,c) in candidates:
         s = score_position(r,c,sym)
         center_bonus = - (abs(r - SIZE//2) + abs(c - SIZE//2))
         s += center_bonus
@@ -303,10 +263,12 @@ def ai_choose_move(sym, difficulty='hard'):
 
 # UI drawing: buttons, info panel, hover cell highlight
 
-def draw_ui():
+def ui_hover_state(mx, my):
+    return tuple(rect.collidepoint(mx,my) for rect in (restart_rect, mode_rect, diff_rect, continue_rect))
+
+def draw_ui(mx, my):
     ui_panel = pygame.Rect(MARGIN-6, GRID_H + MARGIN - 2, GRID_W+12, UI_HEIGHT+8)
     draw_round_rect(screen, ui_panel, (255,255,255,40), radius=12)
-    mx, my = pygame.mouse.get_pos()
     restart_hover = restart_rect.collidepoint(mx,my)
     draw_round_rect(screen, restart_rect, BUTTON_HOVER if restart_hover else BUTTON_BG, radius=10)
     t = font.render('Restart (R)', True, WHITE)
@@ -347,25 +309,38 @@ def draw_ui():
         info = font.render('No 5-in-row yet. Game continues until board full.', True, WHITE)
         screen.blit(info, (info_x, status_y + 6))
 
+    if ai_status and vs_ai and ai_difficulty == 'hard':
+        if ai_status['kind'] == 'ponder':
+            label = f"AI pondering: expects {ai_status['expects']}, depth {ai_status['depth']}"
+        else:
+            label = f"AI {'played' if ai_status['final'] else 'thinking'}: depth {ai_status['depth']} best {ai_status['move']}"
+        screen.blit(font.render(label, True, WHITE), (info_x, status_y + 36))
+
     hint = font.render('Click a cell to place piece. R restart. M toggle mode. 1/2 difficulty. C change AI symbol.', True, WHITE)
     screen.blit(hint, (left_x, status_y + 96))
 
 # reset function
 
+def cancel_ai():
+    # hentikan search/ponder yang berjalan (reset, ganti mode, simbol, difficulty)
+    global ai_request, ai_status
+    ai_worker.cancel()
+    ai_request = None
+    ai_status = None
+
 def reset_game():
     global board, turn_X, score_triple_X, score_triple_O, score_five_X, score_five_O
-    global tracked_triples_X, tracked_triples_O, tracked_fives_X, tracked_fives_O
-    global first_five_symbol, first_five_cells, ai_timer
-    board = create_board()
+    global first_five_symbol, first_five_cells, ai_timer, board_dirty
+    cancel_ai()
+    board.reset()
+    five_windows['X'] = []
+    five_windows['O'] = []
+    board_dirty = True
     turn_X = True
     score_triple_X = 0
     score_triple_O = 0
     score_five_X = 0
     score_five_O = 0
-    tracked_triples_X = set()
-    tracked_triples_O = set()
-    tracked_fives_X = set()
-    tracked_fives_O = set()
     first_five_symbol = None
     first_five_cells = []
     ai_timer = 0
@@ -373,10 +348,12 @@ def reset_game():
 # handle placing a move at r,c for current symbol
 
 def place_move(r, c, sym):
-    global turn_X, first_five_symbol, first_five_cells
-    board[r][c] = sym
-    # update scores globally (scan all triples & fives)
-    update_scores_global()
+    global turn_X, first_five_symbol, first_five_cells, board_dirty
+    board.place(r, c, player_of(sym))
+    # update scores inkremental (window baru pasti melewati sel ini)
+    update_scores_at(r, c, sym)
+    five_windows[sym].extend(board.windows_through(r, c, player_of(sym), WIN_LEN))
+    board_dirty = True
     # record first 5-in-a-row cells (for info) if not recorded yet
     if not first_five_symbol:
         cells5 = check_five_at(r, c, sym)
@@ -386,127 +363,178 @@ def place_move(r, c, sym):
     # advance turn
     turn_X = not turn_X
 
-# main loop
-running = True
-while running:
-    dt = clock.tick(FPS)
-    ai_timer += dt
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-            break
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_q:
+# main loop: hanya saat dijalankan langsung; proses worker search paralel (spawn)
+# meng-import modul ini ulang dan tidak boleh membuka jendela
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="XOX 16x16 GUI + AI")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="jumlah proses untuk search paralel root-split (0 = satu thread)")
+    args = parser.parse_args()
+
+    pygame.init()
+    # fonts
+    try:
+        font = pygame.font.SysFont('Segoe UI', 16)
+        big_font = pygame.font.SysFont('Segoe UI', 24)
+    except:
+        font = pygame.font.SysFont(None, 16)
+        big_font = pygame.font.SysFont(None, 24)
+
+    screen = pygame.display.set_mode((WIN_W, WIN_H))
+    pygame.display.set_caption("XOX 16x16 — Modern GUI + AI + 5-in-row scoring")
+    clock = pygame.time.Clock()
+
+    if args.workers > 0:
+        from xox_parallel import ParallelSearcher
+        ai_worker = AIWorker(ParallelSearcher(args.workers)).start()
+    else:
+        ai_worker = AIWorker().start()
+
+    running = True
+    while running:
+        dt = clock.tick(FPS)
+        ai_timer += dt
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
                 running = False
                 break
-            if event.key == pygame.K_r:
-                reset_game()
-            if event.key == pygame.K_m:
-                vs_ai = not vs_ai
-                reset_game()
-            if event.key == pygame.K_1:
-                ai_difficulty = 'easy'
-            if event.key == pygame.K_2:
-                ai_difficulty = 'hard'
-            if event.key == pygame.K_c:
-                if vs_ai:
-                    ai_symbol = 'X' if ai_symbol == 'O' else 'O'
+            if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                frame_key = None  # jendela tertutup/muncul lagi: gambar ulang
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_q:
+                    running = False
+                    break
+                if event.key == pygame.K_r:
                     reset_game()
-        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-            mx, my = event.pos
-            if restart_rect.collidepoint(mx, my):
-                reset_game()
-                continue
-            if mode_rect.collidepoint(mx, my):
-                vs_ai = not vs_ai
-                reset_game()
-                continue
-            if diff_rect.collidepoint(mx, my):
-                ai_difficulty = 'easy' if ai_difficulty == 'hard' else 'hard'
-                continue
-            # click grid
-            if MARGIN <= mx < MARGIN + GRID_W and MARGIN <= my < MARGIN + GRID_H:
-                c = (mx - MARGIN) // CELL
-                r = (my - MARGIN) // CELL
-                if 0 <= r < SIZE and 0 <= c < SIZE and board[r][c] == EMPTY:
-                    current_sym = 'X' if turn_X else 'O'
-                    human_turn = True
-                    if vs_ai and current_sym == ai_symbol:
-                        human_turn = False
-                    if human_turn:
-                        place_move(r, c, current_sym)
-                        ai_timer = 0
-
-    # AI move
-    if vs_ai:
-        current_sym = 'X' if turn_X else 'O'
-        if current_sym == ai_symbol:
-            if ai_timer >= ai_think_delay:
+                if event.key == pygame.K_m:
+                    vs_ai = not vs_ai
+                    reset_game()
+                if event.key == pygame.K_1:
+                    ai_difficulty = 'easy'
+                    cancel_ai()
+                if event.key == pygame.K_2:
+                    ai_difficulty = 'hard'
+                    cancel_ai()
+                if event.key == pygame.K_c:
+                    if vs_ai:
+                        ai_symbol = 'X' if ai_symbol == 'O' else 'O'
+                        reset_game()
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                mx, my = event.pos
+                if restart_rect.collidepoint(mx, my):
+                    reset_game()
+                    continue
+                if mode_rect.collidepoint(mx, my):
+                    vs_ai = not vs_ai
+                    reset_game()
+                    continue
+                if diff_rect.collidepoint(mx, my):
+                    ai_difficulty = 'easy' if ai_difficulty == 'hard' else 'hard'
+                    cancel_ai()
+                    continue
+                # click grid
+                if MARGIN <= mx < MARGIN + GRID_W and MARGIN <= my < MARGIN + GRID_H:
+                    c = (mx - MARGIN) // CELL
+                    r = (my - MARGIN) // CELL
+                    if 0 <= r < SIZE and 0 <= c < SIZE and board.is_empty(r, c):
+                        current_sym = 'X' if turn_X else 'O'
+                        human_turn = True
+                        if vs_ai and current_sym == ai_symbol:
+                            human_turn = False
+                        if human_turn:
+                            place_move(r, c, current_sym)
+                            ai_timer = 0
+
+        # AI move: 'hard' lewat ai_worker (think di giliran AI, ponder di giliran manusia)
+        if vs_ai and not board_full():
+            current_sym = 'X' if turn_X else 'O'
+            if ai_difficulty == 'hard':
+                if ai_request != board.count():
+                    if current_sym == ai_symbol:
+                        ai_worker.think(board, player_of(ai_symbol), ai_think_delay / 1000.0)
+                    else:
+                        ai_worker.ponder(board, player_of(current_sym))
+                    ai_request = board.count()
+                res = ai_worker.poll()
+                if res is not None and res is not ai_status:
+                    ai_status = res
+                    frame_key = None
+                if current_sym == ai_symbol and res and res['kind'] == 'think' and res['final'] \
+                        and ai_timer >= ai_think_delay:
+                    print(f"[AI] depth {res['depth']}, {res['nodes']} nodes, {res['nps'] / 1000:.1f} knps, "
+                          f"{res['time_ms']:.0f} ms, score {res['score']}"
+                          + (" (ponder hit)" if res['ponder_hit'] else ""))
+                    mv = res['move'] or ai_choose_move(ai_symbol, difficulty='hard')
+                    if mv:
+                        r,c = mv
+                        place_move(r,c,ai_symbol)
+                    ai_timer = 0
+            elif current_sym == ai_symbol and ai_timer >= ai_think_delay:
                 mv = ai_choose_move(ai_symbol, difficulty=ai_difficulty)
                 if mv:
                     r,c = mv
                     place_move(r,c,ai_symbol)
                 ai_timer = 0
 
-    # draw everything
-    draw_gradient_background()
-    draw_board_panel()
-    # hover cell
-    mx, my = pygame.mouse.get_pos()
-    if MARGIN <= mx < MARGIN + GRID_W and MARGIN <= my < MARGIN + GRID_H:
-        c_hover = (mx - MARGIN) // CELL
-        r_hover = (my - MARGIN) // CELL
-        if 0 <= r_hover < SIZE and 0 <= c_hover < SIZE and board[r_hover][c_hover] == EMPTY:
-            surf = pygame.Surface((CELL, CELL), pygame.SRCALPHA)
-            surf.fill((*CELL_HOVER, 180))
-            screen.blit(surf, (MARGIN + c_hover*CELL, MARGIN + r_hover*CELL))
-
-    # highlight ALL current 5-in-row windows for both players
-    current_X_fives = find_all_windows_of_length(WIN_LEN, 'X')
-    current_O_fives = find_all_windows_of_length(WIN_LEN, 'O')
-    # highlight O first (red), then X (blue) so X highlight sits on top if overlapping
-    for f in current_O_fives:
-        highlight_cells(list(f), color=HIGHLIGHT_O)
-    for f in current_X_fives:
-        highlight_cells(list(f), color=HIGHLIGHT_X)
-
-    # also highlight first found 5-in-a-row (kept as accent)
-    if first_five_cells:
-        highlight_cells(first_five_cells, color=(255,200,120,120))
-
-    draw_pieces()
-    draw_ui()
-
-    # if board full: show final summary pop-up (overlay)
-    if board_full():
-        overlay = pygame.Surface((WIN_W, WIN_H), pygame.SRCALPHA)
-        overlay.fill((10,10,10,200))
-        screen.blit(overlay, (0,0))
-        # summary box
-        box = pygame.Rect(WIN_W//2 - 320, WIN_H//2 - 140, 640, 280)
-        draw_round_rect(screen, box, (255,255,255), radius=12)
-        title = big_font.render('Game Complete — Final Scores', True, TEXT)
-        screen.blit(title, (box.x + 20, box.y + 20))
-        stext = font.render(f'X 3-in-row count: {score_X}', True, TEXT)
-        screen.blit(stext, (box.x + 20, box.y + 80))
-        stext2 = font.render(f'O 3-in-row count: {score_O}', True, TEXT)
-        screen.blit(stext2, (box.x + 20, box.y + 110))
-        if first_five_found:
-            fw = font.render(f'First 5-in-row by: {"X" if first_five_found=="X" else "O"}', True, ACCENT)
-            screen.blit(fw, (box.x + 20, box.y + 150))
-        # declare score winner
-        if score_X > score_O:
-            result = 'Winner by score: X'
-        elif score_O > score_X:
-            result = 'Winner by score: O'
-        else:
-            result = 'Score tied'
-        res = big_font.render(result, True, ACCENT)
-        screen.blit(res, (box.x + 20, box.y + 190))
-        info = font.render('Press R to restart or Q to quit.', True, TEXT)
-        screen.blit(info, (box.x + 20, box.y + 230))
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+        # draw: komposisi ulang hanya jika papan, hover atau state UI berubah
+        mx, my = pygame.mouse.get_pos()
+        hover_cell = None
+        if MARGIN <= mx < MARGIN + GRID_W and MARGIN <= my < MARGIN + GRID_H:
+            c_hover = (mx - MARGIN) // CELL
+            r_hover = (my - MARGIN) // CELL
+            if 0 <= r_hover < SIZE and 0 <= c_hover < SIZE and board.is_empty(r_hover, c_hover):
+                hover_cell = (r_hover, c_hover)
+        key = (board.count(), hover_cell, ui_hover_state(mx, my), turn_X, vs_ai, ai_difficulty, ai_symbol)
+        if board_dirty:
+            rebuild_board_layer()
+            board_dirty = False
+            frame_key = None
+        if key == frame_key:
+            continue
+        frame_key = key
+
+        screen.blit(board_layer, (0, 0))
+        # hover cell
+        if hover_cell:
+            r_hover, c_hover = hover_cell
+            screen.blit(cell_tile((*CELL_HOVER, 180)), (MARGIN + c_hover*CELL, MARGIN + r_hover*CELL))
+        draw_ui(mx, my)
+
+        # if board full: show final summary pop-up (overlay)
+        if board_full():
+            overlay = pygame.Surface((WIN_W, WIN_H), pygame.SRCALPHA)
+            overlay.fill((10,10,10,200))
+            screen.blit(overlay, (0,0))
+            # summary box
+            box = pygame.Rect(WIN_W//2 - 320, WIN_H//2 - 140, 640, 280)
+            draw_round_rect(screen, box, (255,255,255), radius=12)
+            title = big_font.render('Game Complete — Final Scores', True, TEXT)
+            screen.blit(title, (box.x + 20, box.y + 20))
+            stext = font.render(f'X 3-in-row count: {score_triple_X}   5-in-row count: {score_five_X}', True, TEXT)
+            screen.blit(stext, (box.x + 20, box.y + 80))
+            stext2 = font.render(f'O 3-in-row count: {score_triple_O}   5-in-row count: {score_five_O}', True, TEXT)
+            screen.blit(stext2, (box.x + 20, box.y + 110))
+            if first_five_symbol:
+                fw = font.render(f'First 5-in-row by: {first_five_symbol}', True, ACCENT)
+                screen.blit(fw, (box.x + 20, box.y + 150))
+            # declare score winner: 5-in-row dulu, 3-in-row sebagai penentu seri
+            score_X = (score_five_X, score_triple_X)
+            score_O = (score_five_O, score_triple_O)
+            if score_X > score_O:
+                result = 'Winner by score: X'
+            elif score_O > score_X:
+                result = 'Winner by score: O'
+            else:
+                result = 'Score tied'
+            res = big_font.render(result, True, ACCENT)
+            screen.blit(res, (box.x + 20, box.y + 190))
+            info = font.render('Press R to restart or Q to quit.', True, TEXT)
+            screen.blit(info, (box.x + 20, box.y + 230))
+
+        pygame.display.flip()
+
+    ai_worker.stop()
+    ai_worker.searcher.close()
+    pygame.quit()
+    sys.exit()
@@ -0,0 +1,371 @@
+# xox_ai.py
+# AI search untuk XOX 16x16 (Gomoku-like) di atas XoxBoard:
+# - negamax alpha-beta dengan iterative deepening dan batas waktu (bukan depth tetap)
+# - transposition table berukuran tetap (index hash Zobrist), replacement
+#   depth-preferred + generasi (entry dari search lama selalu boleh ditimpa)
+# - urutan langkah: langkah TT, killer move per ply, history heuristic, skor pola sel
+# - evaluasi: total skor tabel pola (xox_patterns) yang dijaga inkremental oleh
+#   XoxBoard, jadi evaluasi leaf O(1) tanpa loop sel
+# AIWorker menjalankan search di thread sendiri (snapshot papan, bisa dibatalkan,
+# ponder saat giliran lawan) supaya loop GUI tidak pernah menunggu search.
+
+import threading
+import time
+
+from xox_engine import X, O
+
+WIN_SCORE = 10 ** 9
+MATE_BOUND = WIN_SCORE - 1000
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def evaluate(board, p):
+    """Skor posisi dari sudut pandang p (pemain yang akan jalan)."""
+    return board.pattern_eval(p)
+
+
+def candidate_moves(board):
+    """Sel frontier papan (radius 2 dari batu mana pun, dijaga inkremental oleh XoxBoard)."""
+    return board.candidate_indices()
+
+
+def winning_cells(board, p):
+    """Sel kosong yang langsung jadi lima untuk p (bitboard five_cells milik board)."""
+    f = board.five_cells[p]
+    out = []
+    while f:
+        low = f & -f
+        out.append(low.bit_length() - 1)
+        f ^= low
+    return out
+
+
+def root_moves(board, p):
+    """(langkah root, langkah menang langsung atau None); ancaman lima lawan -> hanya blok."""
+    moves = candidate_moves(board)
+    wins = winning_cells(board, p)
+    if wins:
+        return moves, wins[0]
+    return winning_cells(board, 1 - p) or moves, None
+
+
+class Searcher:
+    """
+    tt_bits : ukuran transposition table = 2**tt_bits slot
+    Statistik search terakhir ada di hasil search(): depth, nodes, nps, time_ms.
+    """
+
+    def __init__(self, tt_bits=18, max_ply=64):
+        self.tt_mask = (1 << tt_bits) - 1
+        self.tt = [None] * (1 << tt_bits)
+        self.generation = 0
+        self.max_ply = max_ply
+        self.killers = [[None, None] for _ in range(max_ply + 1)]
+        self.hist = None
+        self.nodes = 0
+        self.deadline = 0.0
+        self.stop_flag = False   # di-set thread lain untuk membatalkan search berjalan
+        self.should_stop = None  # opsional: fungsi() -> True untuk berhenti (dipakai worker proses)
+
+    # --- transposition table ---
+    def tt_probe(self, h):
+        e = self.tt[h & self.tt_mask]
+        return e if e is not None and e[0] == h else None
+
+    def tt_store(self, h, depth, flag, score, move, ply):
+        slot = h & self.tt_mask
+        old = self.tt[slot]
+        # depth-preferred, tapi entry dari search sebelumnya selalu boleh diganti
+        if old is None or old[5] != self.generation or depth >= old[1]:
+            # skor menang disimpan relatif posisi ini, bukan relatif root
+            if score > MATE_BOUND:
+                score += ply
+            elif score < -MATE_BOUND:
+                score -= ply
+            self.tt[slot] = (h, depth, flag, score, move, self.generation)
+
+    # --- urutan langkah ---
+    def order(self, board, p, moves, tt_move, ply):
+        value = board.cell_value
+        hist = self.hist[p]
+        k1, k2 = self.killers[ply]
+
+        def key(i):
+            if i == tt_move:
+                return 1 << 60
+            s = hist[i] + value(i, p) + value(i, 1 - p)   # serang + blok
+            if i == k1 or i == k2:
+                s += 1 << 40
+            return s
+
+        return sorted(moves, key=key, reverse=True)
+
+    # --- negamax ---
+    def negamax(self, board, p, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 255 and (self.stop_flag or time.perf_counter() > self.deadline
+                                     or (self.should_stop is not None and self.should_stop())):
+            raise SearchTimeout()
+
+        h = board.hash
+        tt_move = None
+        e = self.tt_probe(h)
+        if e is not None:
+            tt_move = e[4]
+            if e[1] >= depth:
+                score = e[3]
+                if score > MATE_BOUND:
+                    score -= ply
+                elif score < -MATE_BOUND:
+                    score += ply
+                if e[2] == EXACT:
+                    return score
+                if e[2] == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        if board.five_cells[p]:
+            return WIN_SCORE - ply
+        if depth <= 0 or ply >= self.max_ply:
+            return evaluate(board, p)
+        # lawan mengancam lima: hanya langkah blok yang masuk akal
+        moves = winning_cells(board, 1 - p) or candidate_moves(board)
+        if not moves:
+            return 0
+
+        alpha_orig = alpha
+        best, best_move = -WIN_SCORE - 1, None
+        for i in self.order(board, p, moves, tt_move, ply):
+            board.place_at(i, p)
+            try:
+                score = -self.negamax(board, 1 - p, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.undo()
+            if score > best:
+                best, best_move = score, i
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        killers = self.killers[ply]
+                        if killers[0] != i:
+                            killers[1], killers[0] = killers[0], i
+                        self.hist[p][i] += depth * depth
+                        break
+
+        flag = UPPER if best <= alpha_orig else (LOWER if best >= beta else EXACT)
+        self.tt_store(h, depth, flag, best, best_move, ply)
+        return best
+
+    def search_root(self, board, p, depth, moves):
+        alpha, beta = -WIN_SCORE - 1, WIN_SCORE + 1
+        best, best_move = -WIN_SCORE - 1, moves[0]
+        for i in moves:
+            board.place_at(i, p)
+            try:
+                score = -self.negamax(board, 1 - p, depth - 1, -beta, -alpha, 1)
+            finally:
+                board.undo()
+            if score > best:
+                best, best_move = score, i
+                alpha = max(alpha, score)
+        self.tt_store(board.hash, depth, EXACT, best, best_move, 0)
+        return best_move, best
+
+    def begin(self, board, time_limit):
+        """Siapkan search baru: deadline, counter node, generasi TT, killer, history."""
+        self.deadline = time.perf_counter() + time_limit
+        self.nodes = 0
+        self.generation += 1
+        self.killers = [[None, None] for _ in range(self.max_ply + 1)]
+        if self.hist is None or len(self.hist[0]) != board.nb:
+            self.hist = [[0] * board.nb for _ in (X, O)]
+        else:
+            for row in self.hist:
+                for i in range(len(row)):
+                    row[i] >>= 1
+
+    def close(self):
+        """Tidak ada resource; ada supaya bisa dipertukarkan dengan ParallelSearcher."""
+
+    def search(self, board, p, time_limit=0.35, max_depth=32, on_depth=None, on_begin=None):
+        """
+        Iterative deepening sampai time_limit detik (atau stop_flag). Return dict:
+        move (r, c), score, depth (selesai penuh), nodes, nps, time_ms.
+        on_depth(hasil) dipanggil setiap satu depth selesai (hasil sementara).
+        on_begin() dipanggil tepat setelah deadline di-set (boleh menggantinya).
+        """
+        t0 = time.perf_counter()
+        self.begin(board, time_limit)
+        if on_begin is not None:
+            on_begin()
+
+        def result(move, score, depth):
+            elapsed = time.perf_counter() - t0
+            return {"move": board.rc(move) if move is not None else None, "score": score,
+                    "depth": depth, "nodes": self.nodes, "time_ms": elapsed * 1000,
+                    "nps": self.nodes / max(elapsed, 1e-9)}
+
+        moves, win = root_moves(board, p)
+        if win is not None:
+            return result(win, WIN_SCORE, 0)
+        if not moves:
+            return result(None, 0, 0)
+        if len(moves) == 1:
+            return result(moves[0], 0, 0)
+
+        moves = self.order(board, p, moves, None, 0)
+        best_move, best_score, done = moves[0], 0, 0
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self.search_root(board, p, depth, moves)
+            except SearchTimeout:
+                break
+            best_move, best_score, done = move, score, depth
+            if on_depth is not None:
+                on_depth(result(move, score, depth))
+            # langkah terbaik dulu di iterasi berikutnya
+            moves.remove(move)
+            moves.insert(0, move)
+            if abs(score) > MATE_BOUND:
+                break
+        return result(best_move, best_score, done)
+
+
+class AIWorker:
+    """
+    Search di thread sendiri di atas snapshot papan. Satu job aktif sekaligus;
+    job baru atau cancel() menghentikan job lama di cek waktu berikutnya.
+
+    think(board, p, time_limit) : cari langkah untuk p
+    ponder(board, p)            : saat giliran lawan p: tebak langkah p dengan search
+                                  pendek, lalu cari balasan untuk posisi tebakan itu.
+                                  Jika think() berikutnya datang dari posisi tebakan
+                                  (ponder hit), search ponder diteruskan dengan
+                                  deadline baru, bukan dimulai ulang.
+    poll()                      : hasil terbaru job aktif (dict hasil search + kind,
+                                  final, ponder_hit, expects) atau None
+    """
+
+    def __init__(self, searcher=None, guess_limit=0.15, ponder_limit=60.0):
+        self.searcher = searcher or Searcher()
+        self.guess_limit = guess_limit
+        self.ponder_limit = ponder_limit
+        self._cond = threading.Condition()
+        self._job_id = 0
+        self._pending = None
+        self._running = None
+        self._result = None
+        self._stop = False
+        self._thread = None
+
+    def _submit(self, kind, board, p, time_limit):
+        job = {"kind": kind, "board": board.copy(), "p": p, "time_limit": time_limit,
+               "history": list(board.history), "guess": None, "last": None, "done": False,
+               "ponder_hit": False, "deadline": None}
+        with self._cond:
+            self._job_id += 1
+            job["id"] = self._job_id
+            self._pending = job
+            self._result = None
+            self.searcher.stop_flag = True
+            self._cond.notify()
+
+    def think(self, board, p, time_limit):
+        with self._cond:
+            job = self._running
+            if job is not None and job["id"] == self._job_id and job["kind"] == "ponder" \
+                    and job["guess"] is not None and board.history == job["history"] + [job["guess"]]:
+                job["kind"], job["ponder_hit"] = "think", True
+                if job["done"]:
+                    self._result = self._make_result(job, job["last"], True)
+                else:
+                    # deadline milik job: jika search balasan belum mulai, _apply_deadline
+                    # memasangnya lagi setelah begin() (yang akan menimpa dengan ponder_limit)
+                    job["deadline"] = time.perf_counter() + time_limit
+                    self.searcher.deadline = job["deadline"]
+                return
+        self._submit("think", board, p, time_limit)
+
+    def ponder(self, board, p):
+        self._submit("ponder", board, p, self.ponder_limit)
+
+    def cancel(self):
+        with self._cond:
+            self._job_id += 1
+            self._pending = None
+            self._result = None
+            self.searcher.stop_flag = True
+
+    def poll(self):
+        with self._cond:
+            return self._result
+
+    def _make_result(self, job, res, final):
+        guess = job["board"].rc(job["guess"]) if job["guess"] is not None else None
+        return dict(res, kind=job["kind"], final=final, ponder_hit=job["ponder_hit"], expects=guess)
+
+    def _post(self, job, res, final):
+        with self._cond:
+            if job["id"] != self._job_id:
+                return   # job sudah dibatalkan / diganti
+            if final:
+                job["done"], job["last"] = True, res
+            self._result = self._make_result(job, res, final)
+
+    def _apply_deadline(self, job):
+        """Dipanggil search setelah deadline-nya sendiri di-set: deadline ponder hit menang."""
+        with self._cond:
+            if job["deadline"] is not None:
+                self.searcher.deadline = job["deadline"]
+
+    def _run(self, job):
+        board, p = job["board"], job["p"]
+        if job["kind"] == "ponder":
+            guess = self.searcher.search(board, p, self.guess_limit)["move"]
+            if guess is None or self.searcher.stop_flag:
+                return
+            with self._cond:
+                job["guess"] = board.place(*guess, p)
+            p = 1 - p
+        res = self.searcher.search(board, p, job["time_limit"],
+                                   on_depth=lambda r: self._post(job, r, False),
+                                   on_begin=lambda: self._apply_deadline(job))
+        self._post(job, res, True)
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stop:
+                    self._cond.wait()
+                if self._stop:
+                    return
+                job = self._running = self._pending
+                self._pending = None
+                self.searcher.stop_flag = False
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"[WARN] AIWorker: {e}")
+                self._post(job, {"move": None, "score": 0, "depth": 0, "nodes": 0,
+                                 "nps": 0.0, "time_ms": 0.0}, True)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.cancel()
+        with self._cond:
+            self._stop = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
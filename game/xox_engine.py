@@ -0,0 +1,479 @@
+# xox_engine.py
+# Engine papan XOX 16x16 tanpa pygame: bitboard per pemain + tabel run-length
+# per arah yang di-update inkremental setiap place/undo.
+#
+# Hash Zobrist posisi (self.hash) juga di-update inkremental untuk transposition table.
+# Frontier: bitboard sel kosong dalam radius FRONTIER_RADIUS (kotak) dari batu mana pun,
+# dijaga lewat hitungan tetangga per sel; ini sumber kandidat langkah untuk AI.
+# Pola: key base-3 garis 2*win_len-1 sel per (pemain, arah, sel) + total skor pola
+# sel kosong per pemain (xox_patterns), di-update hanya untuk sel segaris dengan langkah.
+#
+# Layout index: papan diberi border satu sel (baris 0 dan SIZE+1, kolom 0)
+# dengan lebar baris W = SIZE + 1, sehingga geser 1 / W / W+1 / W-1 tidak
+# pernah "membungkus" ke baris lain dan tetangga sel mana pun selalu index valid.
+#     idx(r, c) = (r + 1) * W + c + 1
+
+from xox_patterns import FIVE, OWN_D, BLOCK_D, key_weight, pattern_classes, pattern_table
+
+EMPTY, X, O, WALL = -1, 0, 1, 2
+SYMBOLS = ('X', 'O')
+CHAR = {EMPTY: '.', X: 'X', O: 'O'}
+
+DIR_RC = ((1, 0), (0, 1), (1, 1), (1, -1))   # vertikal, horizontal, diagonal, anti-diagonal (urutan xox.py)
+FRONTIER_RADIUS = 2
+
+_zobrist_cache = {}
+
+
+def zobrist_table(nb, seed=0x5EED):
+    """Angka acak 64-bit per (pemain, index sel); seed tetap supaya hash sama antar proses."""
+    key = (nb, seed)
+    if key not in _zobrist_cache:
+        import random
+        rng = random.Random(seed)
+        _zobrist_cache[key] = [[rng.getrandbits(64) for _ in range(nb)] for _ in (X, O)]
+    return _zobrist_cache[key]
+
+
+def player_of(sym):
+    return X if sym == 'X' else O
+
+
+class XoxBoard:
+    def __init__(self, size=16, win_len=5):
+        self.size = size
+        self.win_len = win_len
+        self.W = W = size + 1
+        self.dirs = (W, 1, W + 1, W - 1)          # geser index untuk DIR_RC
+        self.nb = (size + 2) * W + 1
+        self.cells = [self.idx(r, c) for r in range(size) for c in range(size)]
+        self.cell_mask = sum(1 << i for i in self.cells)
+        self.zobrist = zobrist_table(self.nb)
+        # tetangga tiap sel dalam radius frontier, dari (r, c) supaya tidak membungkus baris
+        R = FRONTIER_RADIUS
+        self.nbhd = [None] * self.nb
+        for i in self.cells:
+            r, c = self.rc(i)
+            self.nbhd[i] = [self.idx(r + dr, c + dc)
+                            for dr in range(-R, R + 1) for dc in range(-R, R + 1)
+                            if (dr or dc) and 0 <= r + dr < size and 0 <= c + dc < size]
+        self.center = self.idx(size // 2, size // 2)
+        # pola: pat_nbrs[k][j] = [(i, bobot posisi j di garis milik i)], base_key[k][i] = key papan kosong
+        self.pattern_table = pattern_table(win_len)
+        self.pattern_five = [int(cls == FIVE) for cls in pattern_classes(win_len)]
+        self.pat_nbrs = [[None] * self.nb for _ in DIR_RC]
+        self.base_key = [[0] * self.nb for _ in DIR_RC]
+        span = win_len - 1
+        for k, (dr, dc) in enumerate(DIR_RC):
+            for j in self.cells:
+                r, c = self.rc(j)
+                nbrs = []
+                for t in range(-span, span + 1):
+                    if not t:
+                        continue
+                    rr, cc = r - t * dr, c - t * dc
+                    w = key_weight(span + t, win_len)
+                    if 0 <= rr < size and 0 <= cc < size:
+                        nbrs.append((self.idx(rr, cc), w))
+                    rr, cc = r + t * dr, c + t * dc
+                    if not (0 <= rr < size and 0 <= cc < size):
+                        self.base_key[k][j] += BLOCK_D * w   # luar papan = terblok
+                self.pat_nbrs[k][j] = nbrs
+        self.reset()
+
+    # --- koordinat ---
+    def idx(self, r, c):
+        return (r + 1) * self.W + c + 1
+
+    def rc(self, i):
+        return i // self.W - 1, i % self.W - 1
+
+    # --- state ---
+    def reset(self):
+        self.grid = [WALL] * self.nb
+        for i in self.cells:
+            self.grid[i] = EMPTY
+        self.stones = [0, 0]
+        # fwd[p][k][i]: jumlah batu p beruntun mulai dari i ke arah +dirs[k] (termasuk i)
+        # bwd[p][k][i]: sama, ke arah -dirs[k]
+        self.fwd = [[[0] * self.nb for _ in self.dirs] for _ in (X, O)]
+        self.bwd = [[[0] * self.nb for _ in self.dirs] for _ in (X, O)]
+        self.history = []
+        self.hash = 0
+        self.near = [0] * self.nb      # jumlah batu dalam radius frontier
+        self.frontier = 0
+        # pkey[p][k][i]: key pola sel i arah k dari sudut pandang p
+        self.pkey = [[list(bk) for bk in self.base_key] for _ in (X, O)]
+        table = self.pattern_table
+        total = sum(table[bk[i]] for bk in self.base_key for i in self.cells)
+        self.pat_sum = [total, total]  # jumlah skor pola semua sel kosong per pemain
+        # sel kosong yang langsung jadi lima untuk p: jumlah arah FIVE per sel + bitboard
+        self.five_cnt = [[0] * self.nb for _ in (X, O)]
+        self.five_cells = [0, 0]
+
+    def copy(self):
+        """Snapshot posisi: tabel statis dibagi, state di-reset lalu history diputar ulang."""
+        b = object.__new__(XoxBoard)
+        b.__dict__.update(self.__dict__)
+        b.reset()
+        for i in self.history:
+            b.place_at(i, self.grid[i])
+        return b
+
+    def get(self, r, c):
+        """Simbol di (r, c): '.', 'X' atau 'O'."""
+        return CHAR[self.grid[self.idx(r, c)]]
+
+    def is_empty(self, r, c):
+        return self.grid[self.idx(r, c)] == EMPTY
+
+    def count(self):
+        return len(self.history)
+
+    def full(self):
+        return len(self.history) == len(self.cells)
+
+    def empties(self):
+        g = self.grid
+        return [self.rc(i) for i in self.cells if g[i] == EMPTY]
+
+    def candidate_indices(self):
+        """Index sel frontier (urut naik); papan kosong -> [tengah]."""
+        f = self.frontier
+        if not f:
+            return [] if self.history else [self.center]
+        out = []
+        while f:
+            low = f & -f
+            out.append(low.bit_length() - 1)
+            f ^= low
+        return out
+
+    def candidates(self):
+        return [self.rc(i) for i in self.candidate_indices()]
+
+    # --- pola ---
+    def cell_value(self, i, p):
+        """Skor pola (4 arah) jika p main di sel kosong i."""
+        t = self.pattern_table
+        kp = self.pkey[p]
+        return t[kp[0][i]] + t[kp[1][i]] + t[kp[2][i]] + t[kp[3][i]]
+
+    def pattern_eval(self, p):
+        """Evaluasi posisi dari sudut pandang p: total pola p dikurangi total pola lawan."""
+        return self.pat_sum[p] - self.pat_sum[1 - p]
+
+    def _update_patterns(self, j, q, sign):
+        """Batu q di j ditambah (sign=1) / diambil (sign=-1): geser key sel segaris."""
+        table, five, grid = self.pattern_table, self.pattern_five, self.grid
+        kq, ko = self.pkey[q], self.pkey[1 - q]
+        dq = do = 0
+        for k in range(4):
+            kqk, kok = kq[k], ko[k]
+            for i, w in self.pat_nbrs[k][j]:
+                a, b = kqk[i], kok[i]
+                na, nb_ = a + sign * OWN_D * w, b + sign * BLOCK_D * w
+                kqk[i], kok[i] = na, nb_
+                if five[na] != five[a]:
+                    self._add_five(q, i, five[na] - five[a])
+                if five[nb_] != five[b]:
+                    self._add_five(1 - q, i, five[nb_] - five[b])
+                if grid[i] == EMPTY:
+                    dq += table[na] - table[a]
+                    do += table[nb_] - table[b]
+        self.pat_sum[q] += dq
+        self.pat_sum[1 - q] += do
+
+    def _add_five(self, p, i, delta):
+        cnt = self.five_cnt[p]
+        cnt[i] += delta
+        if cnt[i] and self.grid[i] == EMPTY:
+            self.five_cells[p] |= 1 << i
+        else:
+            self.five_cells[p] &= ~(1 << i)
+
+    def _set_run(self, p, i):
+        """Tulis ulang fwd/bwd untuk run yang melewati i (i sudah berisi batu p)."""
+        for k, d in enumerate(self.dirs):
+            f, b = self.fwd[p][k], self.bwd[p][k]
+            nb_, nf = b[i - d], f[i + d]
+            n = nb_ + nf + 1
+            j = i - nb_ * d
+            for t in range(n):
+                f[j] = n - t
+                b[j] = t + 1
+                j += d
+
+    def place(self, r, c, p):
+        return self.place_at(self.idx(r, c), p)
+
+    def place_at(self, i, p):
+        """place() dengan index sel langsung (dipakai search)."""
+        self.pat_sum[X] -= self.cell_value(i, X)
+        self.pat_sum[O] -= self.cell_value(i, O)
+        self.five_cells[X] &= ~(1 << i)
+        self.five_cells[O] &= ~(1 << i)
+        self.grid[i] = p
+        self.stones[p] |= 1 << i
+        self.hash ^= self.zobrist[p][i]
+        self._set_run(p, i)
+        self._update_patterns(i, p, 1)
+        self.history.append(i)
+        near, grid = self.near, self.grid
+        f = self.frontier & ~(1 << i)
+        for j in self.nbhd[i]:
+            near[j] += 1
+            if near[j] == 1 and grid[j] == EMPTY:
+                f |= 1 << j
+        self.frontier = f
+        return i
+
+    def undo(self):
+        i = self.history.pop()
+        p = self.grid[i]
+        self.grid[i] = EMPTY
+        self.stones[p] &= ~(1 << i)
+        self.hash ^= self.zobrist[p][i]
+        self._update_patterns(i, p, -1)
+        self.pat_sum[X] += self.cell_value(i, X)
+        self.pat_sum[O] += self.cell_value(i, O)
+        for q in (X, O):
+            if self.five_cnt[q][i]:
+                self.five_cells[q] |= 1 << i
+        near = self.near
+        fr = self.frontier
+        for j in self.nbhd[i]:
+            near[j] -= 1
+            if not near[j]:
+                fr &= ~(1 << j)
+        if near[i]:
+            fr |= 1 << i
+        self.frontier = fr
+        for k, d in enumerate(self.dirs):
+            f, b = self.fwd[p][k], self.bwd[p][k]
+            f[i] = b[i] = 0
+            # sisi belakang: run berakhir di i-d, fwd-nya perlu dipotong
+            j, n = i - d, b[i - d]
+            for t in range(n):
+                f[j] = t + 1
+                j -= d
+            # sisi depan: run mulai di i+d, bwd-nya perlu dipotong
+            j, n = i + d, f[i + d]
+            for t in range(n):
+                b[j] = t + 1
+                j += d
+        return self.rc(i)
+
+    # --- query run-length (O(1) per arah) ---
+    def run_through(self, i, p, k):
+        """Panjang run p arah k yang melewati i jika batu p ada / diletakkan di i."""
+        d = self.dirs[k]
+        return self.bwd[p][k][i - d] + 1 + self.fwd[p][k][i + d]
+
+    def max_run_if(self, r, c, p):
+        i = self.idx(r, c)
+        return max(self.run_through(i, p, k) for k in range(4))
+
+    def check_five_at(self, r, c, p):
+        """Sel-sel run >= win_len yang melewati (r, c) untuk batu p (urut), atau []."""
+        i = self.idx(r, c)
+        for k, d in enumerate(self.dirs):
+            back = self.bwd[p][k][i - d]
+            n = back + 1 + self.fwd[p][k][i + d]
+            if n >= self.win_len:
+                start = i - back * d
+                return [self.rc(start + t * d) for t in range(n)]
+        return []
+
+    def count_windows_through(self, r, c, p, L):
+        """
+        Jumlah window beruntun panjang L milik p yang memuat (r, c), semua arah.
+        Dihitung dari run-length: run n sel dengan (r, c) di posisi b memuat
+        window dengan awal s di [max(0, b-L+1), min(b, n-L)].
+        """
+        i = self.idx(r, c)
+        total = 0
+        for k, d in enumerate(self.dirs):
+            b = self.bwd[p][k][i - d]
+            n = b + 1 + self.fwd[p][k][i + d]
+            total += max(0, min(b, n - L) - max(0, b - L + 1) + 1)
+        return total
+
+    def windows_through(self, r, c, p, L):
+        """Window beruntun panjang L milik p yang memuat (r, c): list list (r, c)."""
+        i = self.idx(r, c)
+        out = []
+        for k, d in enumerate(self.dirs):
+            b = self.bwd[p][k][i - d]
+            n = b + 1 + self.fwd[p][k][i + d]
+            for s in range(max(0, b - L + 1), min(b, n - L) + 1):
+                start = i - (b - s) * d
+                out.append([self.rc(start + t * d) for t in range(L)])
+        return out
+
+    # --- window via bitboard ---
+    def window_starts(self, L, p, k):
+        """Bitboard index awal semua window panjang L milik p arah k."""
+        b = self.stones[p]
+        d = self.dirs[k]
+        w = b
+        for t in range(1, L):
+            w &= b >> (t * d)
+        return w
+
+    def windows(self, L, p):
+        """Semua window beruntun panjang L milik p: list list (r, c)."""
+        out = []
+        for k, d in enumerate(self.dirs):
+            w = self.window_starts(L, p, k)
+            while w:
+                low = w & -w
+                i = low.bit_length() - 1
+                out.append([self.rc(i + t * d) for t in range(L)])
+                w ^= low
+        return out
+
+    def count_windows(self, L, p):
+        return sum(bin(self.window_starts(L, p, k)).count('1') for k in range(4))
+
+
+# --- cek kesetaraan skor inkremental vs scan global asli ---
+
+def reference_windows(grid, L, sym):
+    """Salinan find_all_windows_of_length versi awal xox.py (scan seluruh papan)."""
+    size = len(grid)
+    found = set()
+    directions = [(1,0),(0,1),(1,1),(1,-1)]
+    for dr,dc in directions:
+        for r in range(size):
+            for c in range(size):
+                cells = []
+                ok = True
+                for i in range(L):
+                    rr = r + i*dr
+                    cc = c + i*dc
+                    if not (0 <= rr < size and 0 <= cc < size):
+                        ok = False
+                        break
+                    if grid[rr][cc] != sym:
+                        ok = False
+                        break
+                    cells.append((rr,cc))
+                if ok:
+                    found.add(frozenset(cells))
+    return found
+
+
+def check_incremental_scores(games=500, seed=0, checkpoints=4):
+    """
+    Mainkan game acak lewat papan dan update_scores_at milik xox.py (fungsi yang
+    dipakai game, bukan salinannya); skor inkremental harus sama persis dengan
+    jumlah window distinct hasil scan global pada beberapa titik acak tiap game
+    dan di akhir game. Frontier juga dibandingkan dengan hitungan ulang, dan
+    harus kosong lagi setelah undo semua.
+    """
+    import random
+    import xox as game   # butuh pygame (hanya import, tanpa jendela)
+    rng = random.Random(seed)
+    board, size = game.board, game.SIZE
+    lens = {game.TRIPLE_LEN: ("score_triple_X", "score_triple_O"),
+            game.WIN_LEN: ("score_five_X", "score_five_O")}
+    cells = [(r, c) for r in range(size) for c in range(size)]
+    checked = 0
+    for g in range(games):
+        board.reset()
+        for names in lens.values():
+            for name in names:
+                setattr(game, name, 0)
+        grid = [['.'] * size for _ in range(size)]
+        rng.shuffle(cells)
+        n_moves = rng.randint(1, len(cells))
+        stops = set(rng.sample(range(n_moves), min(checkpoints, n_moves))) | {n_moves - 1}
+        for t, (r, c) in enumerate(cells[:n_moves]):
+            p = t % 2
+            board.place(r, c, p)
+            grid[r][c] = SYMBOLS[p]
+            game.update_scores_at(r, c, SYMBOLS[p])
+            if t in stops:
+                for L, names in lens.items():
+                    for q in (X, O):
+                        val = getattr(game, names[q])
+                        ref = len(reference_windows(grid, L, SYMBOLS[q]))
+                        if val != ref:
+                            raise AssertionError(f"game {g} langkah {t}: L={L} {SYMBOLS[q]} "
+                                                 f"inkremental {val} != scan {ref}")
+                if board.frontier != reference_frontier(board):
+                    raise AssertionError(f"game {g} langkah {t}: frontier tidak cocok")
+                if (board.pkey, board.pat_sum) != reference_patterns(board):
+                    raise AssertionError(f"game {g} langkah {t}: key/skor pola tidak cocok")
+                for q in (X, O):
+                    ref = sum(1 << i for i in board.cells if board.grid[i] == EMPTY
+                              and max(board.run_through(i, q, k) for k in range(4)) >= board.win_len)
+                    if board.five_cells[q] != ref:
+                        raise AssertionError(f"game {g} langkah {t}: sel lima {SYMBOLS[q]} tidak cocok")
+                checked += 1
+        while board.history:
+            board.undo()
+        if board.frontier or any(board.near) or board.hash or any(board.five_cells):
+            raise AssertionError(f"game {g}: state tidak kosong setelah undo semua")
+        if (board.pkey, board.pat_sum) != reference_patterns(XoxBoard(size, board.win_len)):
+            raise AssertionError(f"game {g}: pola tidak kembali ke papan kosong setelah undo semua")
+    return checked
+
+
+def reference_patterns(board):
+    """Key pola dan total skor dihitung ulang dari grid (untuk cek)."""
+    L, size = board.win_len, board.size
+    span = L - 1
+    pkey = [[[0] * board.nb for _ in DIR_RC] for _ in (X, O)]
+    pat_sum = [0, 0]
+    for p in (X, O):
+        for k, (dr, dc) in enumerate(DIR_RC):
+            for i in board.cells:
+                r, c = board.rc(i)
+                key = 0
+                for t in range(-span, span + 1):
+                    rr, cc = r + t * dr, c + t * dc
+                    if not t:
+                        continue
+                    if not (0 <= rr < size and 0 <= cc < size):
+                        d = BLOCK_D
+                    else:
+                        g = board.grid[board.idx(rr, cc)]
+                        d = 0 if g == EMPTY else (OWN_D if g == p else BLOCK_D)
+                    key += d * key_weight(span + t, L)
+                pkey[p][k][i] = key
+                if board.grid[i] == EMPTY:
+                    pat_sum[p] += board.pattern_table[key]
+    return pkey, pat_sum
+
+
+def reference_frontier(board):
+    """Frontier dihitung ulang dari grid (untuk cek)."""
+    R = FRONTIER_RADIUS
+    f = 0
+    for i in board.cells:
+        if board.grid[i] != EMPTY:
+            continue
+        r, c = board.rc(i)
+        if any(board.grid[board.idx(rr, cc)] in (X, O)
+               for rr in range(max(0, r - R), min(board.size, r + R + 1))
+               for cc in range(max(0, c - R), min(board.size, c + R + 1))):
+            f |= 1 << i
+    return f
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    parser = argparse.ArgumentParser(description="Utilitas engine XOX")
+    parser.add_argument("--check", type=int, metavar="GAMES",
+                        help="cek skor inkremental, frontier dan pola vs hitung ulang pada GAMES game acak")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.check:
+        t0 = time.perf_counter()
+        n = check_incremental_scores(args.check, seed=args.seed)
+        print(f"[OK] {args.check} game, {n} posisi cocok ({time.perf_counter() - t0:.1f}s)")
+    else:
+        parser.print_help()
@@ -0,0 +1,254 @@
+"""
+Search paralel root-split untuk AI XOX (pengganti Searcher, antarmuka sama).
+
+Setiap depth iterative deepening, langkah-langkah root dibagi ke process pool
+(satu task per langkah, imap_unordered supaya core yang cepat selesai ambil
+task berikutnya). Posisi dikirim sekali per search lewat shared_memory
+(history papan sebagai int32: index | pemain << 16); tiap worker menyimpan
+papan dan Searcher/TT sendiri, dan menyinkronkan papannya secara inkremental
+(undo sampai prefix history sama, lalu place sisanya).
+
+Batas dibagi lewat memori bersama:
+- alpha root: skor terbaik yang sudah pasti di depth ini, dibaca worker
+  sebagai alpha awal dan dinaikkan begitu ada langkah lebih baik
+- deadline (detik epoch): dibaca worker di cek waktu; cancel = set ke 0
+
+Jalankan benchmark (posisi tetap, nodes/detik per jumlah worker):
+    python xox_parallel.py --bench --workers 1,2,4,8 --time 2
+"""
+import argparse
+import multiprocessing as mp
+import os
+import struct
+import time
+from multiprocessing import shared_memory
+
+from xox_ai import MATE_BOUND, WIN_SCORE, SearchTimeout, Searcher, root_moves
+from xox_engine import XoxBoard, X, O
+
+_worker = {}
+
+
+def _init_worker(deadline, alpha, round_id, tt_bits):
+    """Dipanggil sekali per proses: Searcher + TT milik worker ini."""
+    searcher = Searcher(tt_bits)
+    searcher.deadline = float("inf")
+    searcher.should_stop = lambda: time.time() > deadline.value
+    _worker.update(searcher=searcher, alpha=alpha, round_id=round_id, board=None, key=None)
+
+
+def _sync_board(shm_name, size, win_len, key):
+    """Papan worker = snapshot di shared memory (inkremental jika history berlanjut)."""
+    board = _worker["board"]
+    if _worker["key"] == key:
+        return board
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        n = struct.unpack_from("i", shm.buf, 0)[0]
+        moves = [(v & 0xFFFF, v >> 16) for v in struct.unpack_from(f"{n}i", shm.buf, 4)]
+    finally:
+        shm.close()
+    if board is None or board.size != size or board.win_len != win_len:
+        board = _worker["board"] = XoxBoard(size, win_len)
+    common = 0
+    while common < min(n, len(board.history)) and \
+            board.history[common] == moves[common][0] and board.grid[moves[common][0]] == moves[common][1]:
+        common += 1
+    while len(board.history) > common:
+        board.undo()
+    for i, p in moves[common:]:
+        board.place_at(i, p)
+    _worker["key"] = key
+    return board
+
+
+def _search_move(task):
+    """
+    Satu langkah root pada depth tertentu -> (langkah, skor atau None jika habis
+    waktu, nodes, exact). exact=False: skor hanya batas atas (gagal di bawah alpha).
+    """
+    shm_name, size, win_len, key, p, move, depth, rid = task
+    s = _worker["searcher"]
+    if s.should_stop():
+        return move, None, 0, False   # task yang masih antre saat deadline lewat
+    board = _sync_board(shm_name, size, win_len, key)
+    s.begin(board, float("inf"))
+    alpha, round_id = _worker["alpha"], _worker["round_id"]
+    a = alpha.value if round_id.value == rid else -WIN_SCORE - 1
+    board.place_at(move, p)
+    try:
+        score = -s.negamax(board, 1 - p, depth - 1, -WIN_SCORE - 1, -a, 1)
+    except SearchTimeout:
+        return move, None, s.nodes, False
+    finally:
+        board.undo()
+    if score > a:
+        with alpha.get_lock():
+            if round_id.value == rid and score > alpha.value:
+                alpha.value = score
+    return move, score, s.nodes, score > a
+
+
+class ParallelSearcher:
+    """
+    workers : jumlah proses (default os.cpu_count())
+    Dipakai seperti Searcher: search(board, p, time_limit, max_depth, on_depth, on_begin),
+    stop_flag dan deadline bisa di-set dari thread lain (AIWorker).
+    """
+
+    def __init__(self, workers=None, tt_bits=18):
+        self.workers = workers or os.cpu_count() or 1
+        # spawn: aman di semua OS dan tidak mewarisi thread GUI / pygame
+        ctx = mp.get_context("spawn")
+        self._deadline = ctx.RawValue("d", 0.0)
+        self._alpha = ctx.Value("q", 0)
+        self._round = ctx.RawValue("q", 0)
+        self.pool = ctx.Pool(self.workers, initializer=_init_worker,
+                             initargs=(self._deadline, self._alpha, self._round, tt_bits))
+        self.local = Searcher(tt_bits)   # urutan langkah root di proses utama
+        self._stopped = False
+        self.nodes = 0
+
+    # --- antarmuka yang dipakai AIWorker ---
+    @property
+    def stop_flag(self):
+        return self._stopped
+
+    @stop_flag.setter
+    def stop_flag(self, value):
+        self._stopped = value
+        if value:
+            self._deadline.value = 0.0
+
+    @property
+    def deadline(self):
+        return time.perf_counter() + (self._deadline.value - time.time())
+
+    @deadline.setter
+    def deadline(self, value):
+        # perf_counter proses ini -> detik epoch yang bisa dibaca semua worker
+        self._deadline.value = time.time() + (value - time.perf_counter())
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def _expired(self):
+        return self._stopped or time.time() > self._deadline.value
+
+    def search(self, board, p, time_limit=0.35, max_depth=32, on_depth=None, on_begin=None):
+        t0 = time.perf_counter()
+        self.deadline = t0 + time_limit
+        if on_begin is not None:
+            on_begin()
+        self.nodes = 0
+
+        def result(move, score, depth):
+            elapsed = time.perf_counter() - t0
+            return {"move": board.rc(move) if move is not None else None, "score": score,
+                    "depth": depth, "nodes": self.nodes, "time_ms": elapsed * 1000,
+                    "nps": self.nodes / max(elapsed, 1e-9)}
+
+        moves, win = root_moves(board, p)
+        if win is not None:
+            return result(win, WIN_SCORE, 0)
+        if not moves:
+            return result(None, 0, 0)
+        if len(moves) == 1:
+            return result(moves[0], 0, 0)
+        self.local.begin(board, time_limit)
+        moves = self.local.order(board, p, moves, None, 0)
+
+        # snapshot posisi sekali per search
+        values = [i | (board.grid[i] << 16) for i in board.history]
+        shm = shared_memory.SharedMemory(create=True, size=4 * (len(values) + 1))
+        best_move, best_score, done = moves[0], 0, 0
+        try:
+            struct.pack_into(f"{len(values) + 1}i", shm.buf, 0, len(values), *values)
+            key = (shm.name, board.hash, len(values))
+            for depth in range(1, max_depth + 1):
+                if self._expired():
+                    break
+                with self._alpha.get_lock():
+                    self._round.value += 1
+                    self._alpha.value = -WIN_SCORE - 1
+                rid = self._round.value
+                tasks = [(shm.name, board.size, board.win_len, key, p, m, depth, rid) for m in moves]
+                scores, complete = {}, True
+                for move, score, nodes, exact in self.pool.imap_unordered(_search_move, tasks):
+                    self.nodes += nodes
+                    if score is None:
+                        complete = False
+                    else:
+                        scores[move] = (-score, not exact)
+                if not complete:
+                    break
+                # skor sama: skor pasti menang atas batas atas, lalu urutan sebelumnya
+                moves.sort(key=scores.__getitem__)
+                best_move, best_score, done = moves[0], -scores[moves[0]][0], depth
+                if on_depth is not None:
+                    on_depth(result(best_move, best_score, depth))
+                if abs(best_score) > MATE_BOUND:
+                    break
+        finally:
+            shm.close()
+            shm.unlink()
+        return result(best_move, best_score, done)
+
+
+# --- benchmark ---
+
+# posisi tetap (X jalan duluan, bergantian), tanpa menang langsung
+BENCH_POSITIONS = [
+    [(7, 7), (7, 8), (8, 7), (6, 6), (8, 8), (9, 9)],
+    [(7, 7), (8, 8), (7, 8), (7, 9), (6, 7), (8, 7), (6, 8), (5, 9), (8, 6), (6, 9)],
+    [(7, 7), (7, 8), (8, 8), (6, 6), (9, 9), (10, 10), (8, 6), (6, 8), (8, 7), (8, 9),
+     (6, 7), (9, 7), (5, 7), (4, 7)],
+    [(3, 3), (3, 4), (4, 4), (5, 5), (4, 3), (2, 2), (5, 3), (6, 3), (4, 5), (4, 6),
+     (2, 4), (5, 2), (12, 12), (11, 11), (12, 11), (12, 10)],
+]
+
+
+def bench_board(moves):
+    board = XoxBoard()
+    for t, (r, c) in enumerate(moves):
+        board.place(r, c, X if t % 2 == 0 else O)
+    return board
+
+
+def run_bench(searcher, time_limit, label):
+    total_nodes, total_time = 0, 0.0
+    for n, moves in enumerate(BENCH_POSITIONS):
+        board = bench_board(moves)
+        res = searcher.search(board, len(moves) % 2, time_limit)
+        total_nodes += res["nodes"]
+        total_time += res["time_ms"] / 1000
+        print(f"  posisi {n}: depth {res['depth']}, {res['nodes']} nodes, "
+              f"{res['nps'] / 1000:.1f} knps, langkah {res['move']}")
+    nps = total_nodes / max(total_time, 1e-9)
+    print(f"[{label}] {total_nodes} nodes / {total_time:.1f}s = {nps / 1000:.1f} knps")
+    return nps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search paralel root-split untuk AI XOX")
+    parser.add_argument("--bench", action="store_true", help="benchmark nodes/detik pada posisi tetap")
+    parser.add_argument("--workers", default="1,2,4", help="daftar jumlah worker, mis. 1,2,4,8")
+    parser.add_argument("--time", type=float, default=2.0, help="detik per posisi")
+    args = parser.parse_args()
+    if not args.bench:
+        parser.print_help()
+        return
+
+    base = run_bench(Searcher(), args.time, "serial")
+    for n in [int(w) for w in args.workers.split(",") if w.strip()]:
+        searcher = ParallelSearcher(n)
+        try:
+            searcher.search(bench_board(BENCH_POSITIONS[0]), X, 0.5)   # warmup: spawn + import
+            nps = run_bench(searcher, args.time, f"{n} worker")
+        finally:
+            searcher.close()
+        print(f"[INFO] {n} worker: {nps / max(base, 1e-9):.2f}x serial")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# xox_patterns.py
+# Tabel pola garis untuk evaluasi XOX.
+#
+# Untuk sel kosong i dan satu arah, garis 2*win_len-1 sel yang berpusat di i
+# (9 sel untuk win_len 5) dikodekan base-3 dari sudut pandang satu pemain:
+#     0 = kosong, 1 = batu sendiri, 2 = batu lawan / di luar papan
+# Sel pusat tidak ikut dikodekan (selalu kosong), jadi key punya 8 digit:
+# digit ke-t = posisi t di garis, posisi sesudah pusat bergeser satu.
+# PATTERN_TABLE[key] = skor pola yang terbentuk jika pemain itu main di i.
+# Tabel dibangun sekali saat import; XoxBoard menjaga key per sel secara inkremental.
+
+NONE, ONE, TWO, OPEN_TWO, THREE, OPEN_THREE, FOUR, OPEN_FOUR, FIVE = range(9)
+PATTERN_NAMES = ('none', 'one', 'two', 'open two', 'three', 'open three', 'four', 'open four', 'five')
+# skor per arah, index = pola di atas
+PATTERN_SCORES = (0, 1, 10, 60, 80, 600, 700, 10000, 100000)
+
+EMPTY_D, OWN_D, BLOCK_D = 0, 1, 2
+
+# pola setelah satu batu tambahan -> pola sekarang
+_DOWNGRADE = {OPEN_FOUR: OPEN_THREE, FOUR: THREE, OPEN_THREE: OPEN_TWO, THREE: TWO}
+
+
+def _classify(line, L, memo):
+    """Pola terbaik lewat pusat (index L-1, sudah batu sendiri) pada garis `line`."""
+    res = memo.get(line)
+    if res is not None:
+        return res
+    # window L sel yang memuat pusat: awal s = 0 .. L-1
+    wins = set()
+    open_windows = []
+    for s in range(L):
+        w = line[s:s + L]
+        if BLOCK_D in w:
+            continue
+        empties = [s + t for t in range(L) if w[t] == EMPTY_D]
+        if not empties:
+            memo[line] = FIVE
+            return FIVE
+        if len(empties) == 1:
+            wins.add(empties[0])
+        open_windows.append(empties)
+
+    if len(wins) >= 2:
+        res = OPEN_FOUR            # dua sel berbeda yang masing-masing jadi lima
+    elif wins:
+        res = FOUR
+    elif not open_windows:
+        res = NONE                 # semua window terblok: pola mati
+    else:
+        # three / two: apa yang bisa dicapai dengan satu batu lagi
+        res = ONE
+        for e in {e for empties in open_windows for e in empties}:
+            nxt = _classify(line[:e] + (OWN_D,) + line[e + 1:], L, memo)
+            res = max(res, _DOWNGRADE.get(nxt, ONE))
+            if res == OPEN_THREE:
+                break
+    memo[line] = res
+    return res
+
+
+def key_weight(pos, L=5):
+    """Bobot base-3 untuk posisi `pos` (0 .. 2L-2, bukan pusat) di garis."""
+    c = L - 1
+    return 3 ** (pos if pos < c else pos - 1)
+
+
+def decode(key, L=5):
+    """key -> tuple garis 2L-1 digit dengan pusat = batu sendiri."""
+    digits = []
+    for _ in range(2 * L - 2):
+        key, d = divmod(key, 3)
+        digits.append(d)
+    c = L - 1
+    return tuple(digits[:c]) + (OWN_D,) + tuple(digits[c:])
+
+
+_tables = {}
+
+
+def pattern_classes(L=5):
+    """List pola (NONE .. FIVE) untuk semua 3**(2L-2) key."""
+    if L not in _tables:
+        memo = {}
+        _tables[L] = [_classify(decode(key, L), L, memo) for key in range(3 ** (2 * L - 2))]
+    return _tables[L]
+
+
+def pattern_table(L=5):
+    return [PATTERN_SCORES[p] for p in pattern_classes(L)]
+
+
+PATTERN_TABLE = pattern_table(5)
@@ -0,0 +1,149 @@
+"""
+Registry model bersama untuk semua entry point DeepFace / OpenCV DNN.
+
+- Paket dicek dengan importlib.util.find_spec (tanpa mengimpor TensorFlow dkk),
+  pip hanya dipanggil untuk yang benar-benar belum terpasang.
+- deepface diimpor saat pertama kali dibutuhkan, bukan saat modul dimuat.
+- Setiap model dimuat SEKALI per proses lalu dipanaskan dengan satu inferensi
+  dummy, jadi biaya build + load weight tidak jatuh di frame pertama.
+  Model recognition dipanaskan lewat DeepFace.represent sehingga cache model
+  internal DeepFace terisi dan verify/represent berikutnya tidak build ulang.
+- Waktu startup (import, load model, frame pertama) dicatat dan dilaporkan.
+
+Contoh:
+    import model_registry as registry
+    registry.install_missing({"opencv-python": "cv2", "deepface": "deepface"})
+    net = registry.res10_net()
+    ...
+    registry.first_frame("Demo")   # dipanggil di render
+"""
+import importlib.util
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# waktu acuan startup: modul ini sebaiknya diimpor paling awal oleh entry point
+T0 = time.perf_counter()
+
+_cache = {}
+_lock = threading.RLock()
+_timings = []          # (label, detik)
+_first_frame = set()
+
+
+def missing_packages(packages):
+    """packages: dict nama pip -> nama modul. Return nama pip yang belum terpasang."""
+    return [pip for pip, module in packages.items() if importlib.util.find_spec(module) is None]
+
+
+def install_missing(packages):
+    t0 = time.perf_counter()
+    for pkg in missing_packages(packages):
+        print(f"[Installer] Menginstal: {pkg} ...")
+        subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+    _timings.append(("cek dependensi", time.perf_counter() - t0))
+
+
+def get(name, loader, warmup=None):
+    """
+    Model `name` dari cache proses; jika belum ada, loader() lalu warmup(model).
+    Aman dipanggil dari beberapa thread (hanya satu yang memuat).
+    """
+    model = _cache.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        if name not in _cache:
+            t0 = time.perf_counter()
+            model = loader()
+            if warmup is not None:
+                warmup(model)
+            _cache[name] = model
+            _timings.append((name, time.perf_counter() - t0))
+        return _cache[name]
+
+
+def deepface():
+    """Kelas DeepFace, diimpor sekali saat pertama dibutuhkan."""
+    def load():
+        from deepface import DeepFace
+        return DeepFace
+    return get("import deepface", load)
+
+
+def emotion_model():
+    """
+    Client model Emotion DeepFace. Dipakai lewat API publiknya, client.predict(img),
+    dengan input BGR float [0, 1] (N, H, W, 3) seperti yang dikirim DeepFace.analyze;
+    preprocessing (grayscale + resize 48x48) tetap dikerjakan client sendiri.
+    """
+    def load():
+        DeepFace = deepface()
+        try:
+            return DeepFace.build_model(model_name="Emotion", task="facial_attribute")
+        except TypeError:  # deepface lama: build_model(model_name) saja
+            return DeepFace.build_model("Emotion")
+
+    return get("Emotion", load, lambda client: client.predict(np.zeros((1, 48, 48, 3), np.float32)))
+
+
+def recognition_model(model_name="VGG-Face"):
+    """
+    Panaskan model recognition DeepFace. represent() membangun model lewat
+    cache internal DeepFace, jadi panggilan represent/verify berikutnya memakai
+    instance yang sama.
+    """
+    def warm():
+        deepface().represent(np.zeros((224, 224, 3), np.uint8), model_name=model_name,
+                             enforce_detection=False, detector_backend="skip")
+        return model_name
+    return get(f"recognition:{model_name}", warm)
+
+
+def analyze_action(action="emotion", detector_backend="opencv"):
+    """Panaskan DeepFace.analyze (model atribut + detektor) dengan satu frame kosong."""
+    def warm():
+        deepface().analyze(np.zeros((240, 320, 3), np.uint8), actions=[action],
+                           detector_backend=detector_backend, enforce_detection=False, silent=True)
+        return action
+    return get(f"analyze:{action}:{detector_backend}", warm)
+
+
+def face_detector(detector_backend="opencv"):
+    """Panaskan detektor DeepFace.extract_faces untuk backend tertentu."""
+    def warm():
+        deepface().extract_faces(np.zeros((240, 320, 3), np.uint8), detector_backend=detector_backend,
+                                 enforce_detection=False, align=False)
+        return detector_backend
+    return get(f"detector:{detector_backend}", warm)
+
+
+def res10_net(model_dir=None):
+    """Detektor wajah res10 SSD (cv2.dnn), dipanaskan dengan satu forward."""
+    model_dir = model_dir or os.path.join(ROOT, "models")
+
+    def load():
+        from realtime_webcam_cv import load_face_net
+        return load_face_net(model_dir)
+
+    def warm(net):
+        net.setInput(np.zeros((1, 3, 300, 300), np.float32))
+        net.forward()
+
+    return get(f"res10:{os.path.abspath(model_dir)}", load, warm)
+
+
+def first_frame(label="app"):
+    """Panggil di render: laporan startup dicetak sekali saat frame beranotasi pertama tampil."""
+    if label in _first_frame:
+        return
+    _first_frame.add(label)
+    total = time.perf_counter() - T0
+    parts = ", ".join(f"{name} {secs * 1000:.0f}ms" for name, secs in _timings)
+    print(f"[INFO] Startup {label}: frame pertama {total * 1000:.0f}ms ({parts})")
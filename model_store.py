@@ -0,0 +1,258 @@
+"""
+Cache model berbasis isi (SHA-256) untuk artefak model DNN.
+
+Urutan resolusi setiap artefak:
+1. cache lokal  <cache>/sha256/<hash>  -> langsung dipakai (tanpa jaringan)
+2. sumber lokal (folder atau file:// mirror) -> diverifikasi lalu disalin ke cache
+3. download HTTP -> ke file .part, dilanjutkan dengan header Range jika
+   terputus, diverifikasi, lalu os.replace ke cache (atomik)
+
+File hanya masuk cache setelah hash-nya cocok, jadi download setengah jadi
+tidak pernah dipakai. Artefak tanpa hash resmi memakai trust-on-first-use:
+hash unduhan pertama dicatat di <cache>/lock.json dan dicek sesudahnya.
+Sumber lokal hanya dipakai untuk artefak yang hash-nya sudah diketahui,
+atau jika di sebelahnya ada file <nama>.sha256 (dibuat oleh `export`).
+
+Mode offline (MODEL_OFFLINE=1 atau offline=True) tidak pernah menyentuh
+jaringan dan langsung gagal dengan pesan jelas jika artefak tidak ada.
+
+Variabel lingkungan:
+    MODEL_CACHE   folder cache (default ~/.cache/face_models)
+    MODEL_MIRROR  daftar folder / file:// URL dipisah os.pathsep
+    MODEL_OFFLINE 1 = jangan download
+
+CLI:
+    python model_store.py fetch            # isi cache (mis. sebelum dibawa ke node offline)
+    python model_store.py export mirror/   # salin artefak + file .sha256 untuk mirror lokal
+    python model_store.py verify           # cek ulang hash semua artefak di cache
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import shutil
+import sys
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+CHUNK = 1 << 20
+
+# nama file -> url + sha256 (None = trust-on-first-use)
+ARTIFACTS = {
+    "deploy.prototxt": {
+        "url": "https://raw.githubusercontent.com/opencv/opencv/master/samples/dnn/face_detector/deploy.prototxt",
+        # sama dengan models/deploy.prototxt yang ikut di repo
+        "sha256": "dcd661dc48fc9de0a341db1f666a2164ea63a67265c7f779bc12d6b3f2fa67e9",
+    },
+    "res10_300x300_ssd_iter_140000.caffemodel": {
+        "url": "https://github.com/opencv/opencv_3rdparty/raw/dnn_samples_face_detector_20170830/res10_300x300_ssd_iter_140000.caffemodel",
+        "sha256": None,
+    },
+}
+
+
+class ModelStoreError(RuntimeError):
+    pass
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _env_flag(name):
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes")
+
+
+def _source_dir(source):
+    """Folder biasa atau file:// URL -> path folder lokal."""
+    if source.startswith("file://"):
+        return urllib.request.url2pathname(urllib.parse.urlparse(source).path)
+    return source
+
+
+class ModelStore:
+    """
+    sources : folder / file:// URL tambahan, dicek sebelum MODEL_MIRROR
+    offline : None = ikuti MODEL_OFFLINE
+    """
+
+    def __init__(self, cache_dir=None, sources=(), offline=None, artifacts=None):
+        self.cache_dir = cache_dir or os.environ.get("MODEL_CACHE") or \
+            os.path.join(os.path.expanduser("~"), ".cache", "face_models")
+        mirrors = [s for s in os.environ.get("MODEL_MIRROR", "").split(os.pathsep) if s]
+        self.sources = [_source_dir(s) for s in list(sources) + mirrors]
+        self.offline = _env_flag("MODEL_OFFLINE") if offline is None else offline
+        self.artifacts = artifacts or ARTIFACTS
+        self.lock_path = os.path.join(self.cache_dir, "lock.json")
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.cache_dir, "sha256"), exist_ok=True)
+        os.makedirs(os.path.join(self.cache_dir, "tmp"), exist_ok=True)
+
+    # --- hash yang diharapkan ---
+    def _read_lock(self):
+        if not os.path.exists(self.lock_path):
+            return {}
+        with open(self.lock_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _record(self, name, digest):
+        lock = self._read_lock()
+        lock[name] = digest
+        tmp = self.lock_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(lock, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.lock_path)
+
+    def expected(self, name):
+        return self.artifacts[name].get("sha256") or self._read_lock().get(name)
+
+    def blob_path(self, digest):
+        return os.path.join(self.cache_dir, "sha256", digest)
+
+    # --- resolusi ---
+    def resolve(self, name):
+        """Path file terverifikasi untuk artefak `name` (cache -> sumber lokal -> download)."""
+        if name not in self.artifacts:
+            raise ModelStoreError(f"Artefak tidak dikenal: {name}")
+        with self._lock:
+            digest = self.expected(name)
+            if digest and os.path.exists(self.blob_path(digest)):
+                return self.blob_path(digest)
+            path = self._from_sources(name, digest)
+            if path:
+                return path
+            if self.offline:
+                checked = ", ".join([self.cache_dir] + self.sources) or self.cache_dir
+                raise ModelStoreError(
+                    f"{name} tidak ada di cache/mirror ({checked}) dan mode offline aktif. "
+                    f"Jalankan `python model_store.py fetch` di mesin online lalu salin cache-nya, "
+                    f"atau set MODEL_MIRROR ke folder hasil `export`.")
+            return self._download(name, digest)
+
+    def _ingest(self, name, src, digest):
+        """Salin src ke cache lewat file tmp + rename; verifikasi hash dulu."""
+        actual = sha256_file(src)
+        if digest and actual != digest:
+            print(f"[WARN] {src}: hash tidak cocok ({actual[:12]} != {digest[:12]}), dilewati.")
+            return None
+        tmp = os.path.join(self.cache_dir, "tmp", f"{actual}.copy")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, self.blob_path(actual))
+        if not self.artifacts[name].get("sha256"):
+            self._record(name, actual)
+        return self.blob_path(actual)
+
+    def _from_sources(self, name, digest):
+        for src_dir in self.sources:
+            src = os.path.join(src_dir, name)
+            if not os.path.isfile(src):
+                continue
+            want = digest
+            sidecar = src + ".sha256"
+            if not want and os.path.isfile(sidecar):
+                with open(sidecar, encoding="utf-8") as f:
+                    want = f.read().split()[0].strip().lower()
+            if not want:
+                print(f"[WARN] {src}: hash belum diketahui dan tidak ada {name}.sha256, dilewati.")
+                continue
+            path = self._ingest(name, src, want)
+            if path:
+                print(f"[OK] {name} dari mirror {src_dir}")
+                return path
+        return None
+
+    def _download(self, name, digest):
+        url = self.artifacts[name]["url"]
+        part = os.path.join(self.cache_dir, "tmp", f"{name}.part")
+        have = os.path.getsize(part) if os.path.exists(part) else 0
+        req = urllib.request.Request(url, headers={"Range": f"bytes={have}-"} if have else {})
+        print(f"[INFO] Downloading {name} ..." + (f" (lanjut dari {have} byte)" if have else ""))
+        try:
+            with urllib.request.urlopen(req, timeout=30) as resp:
+                # server tanpa dukungan Range mengirim 200 + isi penuh: mulai ulang
+                mode = "ab" if have and resp.status == 206 else "wb"
+                with open(part, mode) as f:
+                    for chunk in iter(lambda: resp.read(CHUNK), b""):
+                        f.write(chunk)
+                # read(n) mengembalikan b"" saat koneksi putus tanpa error; sisa Content-Length
+                # yang belum terbaca berarti body terpotong (jangan sampai diverifikasi / TOFU)
+                if resp.length:
+                    raise http.client.IncompleteRead(b"", resp.length)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:  # 416: .part sudah lengkap
+                raise ModelStoreError(f"Gagal download {name}: HTTP {e.code}") from e
+        except (urllib.error.URLError, http.client.HTTPException, OSError) as e:
+            # termasuk IncompleteRead: koneksi putus di tengah body, .part tetap disimpan
+            raise ModelStoreError(f"Gagal download {name} ({e}); jalankan ulang untuk melanjutkan.") from e
+
+        actual = sha256_file(part)
+        if digest and actual != digest:
+            os.remove(part)
+            raise ModelStoreError(f"Hash {name} tidak cocok ({actual} != {digest}); file dihapus.")
+        os.replace(part, self.blob_path(actual))
+        if not digest:
+            print(f"[INFO] {name}: sha256 {actual} dicatat (trust-on-first-use)")
+            self._record(name, actual)
+        print(f"[OK] {name} tersimpan di cache")
+        return self.blob_path(actual)
+
+    # --- perawatan ---
+    def export(self, dest):
+        """Salin semua artefak + file .sha256 ke dest (untuk MODEL_MIRROR node offline)."""
+        os.makedirs(dest, exist_ok=True)
+        for name in self.artifacts:
+            path = self.resolve(name)
+            shutil.copyfile(path, os.path.join(dest, name))
+            with open(os.path.join(dest, name + ".sha256"), "w", encoding="utf-8") as f:
+                f.write(f"{sha256_file(path)}  {name}\n")
+            print(f"[OK] {name} -> {dest}")
+
+    def verify(self):
+        ok = True
+        for name in self.artifacts:
+            digest = self.expected(name)
+            path = self.blob_path(digest) if digest else None
+            if not path or not os.path.exists(path):
+                print(f"[MISS] {name}")
+                ok = False
+            elif sha256_file(path) != digest:
+                print(f"[BAD] {name}: hash berubah, dihapus dari cache")
+                os.remove(path)
+                ok = False
+            else:
+                print(f"[OK] {name} {digest[:12]}")
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cache model DNN berbasis SHA-256")
+    parser.add_argument("command", choices=["fetch", "export", "verify"])
+    parser.add_argument("dest", nargs="?", help="folder tujuan untuk export")
+    parser.add_argument("--cache", help="folder cache (default MODEL_CACHE / ~/.cache/face_models)")
+    parser.add_argument("--offline", action="store_true")
+    args = parser.parse_args()
+
+    store = ModelStore(cache_dir=args.cache, offline=args.offline or None)
+    try:
+        if args.command == "fetch":
+            for name in store.artifacts:
+                print(f"{name}: {store.resolve(name)}")
+        elif args.command == "export":
+            if not args.dest:
+                parser.error("export butuh folder tujuan")
+            store.export(args.dest)
+        else:
+            sys.exit(0 if store.verify() else 1)
+    except ModelStoreError as e:
+        print(f"[ERROR] {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Pipeline emosi dua tahap untuk mood_vision.
+
+1. Detektor murah (res10 SSD dari realtime_webcam_cv) mencari box wajah.
+2. Tiap track menyimpan crop wajah 48x48 grayscale terakhir yang dianalisis;
+   model emosi DeepFace hanya dijalankan untuk track yang crop-nya berubah
+   cukup banyak (atau sudah terlalu lama), dan semua crop itu diproses dalam
+   SATU panggilan predict (batch).
+
+Jadi scene dengan N wajah tidak lagi berarti N kali analisis full-frame.
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import model_registry as registry
+from realtime_webcam_cv import postprocess_detections
+
+# urutan output model Emotion DeepFace
+DEEPFACE_EMOTIONS = ("angry", "disgust", "fear", "happy", "sad", "surprise", "neutral")
+CROP_SIZE = 48
+
+
+class FaceDetector:
+    """Detektor res10 SSD 300x300; return box xywh (float32, N x 4)."""
+
+    def __init__(self, model_dir=None, conf=0.5, nms=0.4):
+        self.net = registry.res10_net(model_dir)
+        self.conf = conf
+        self.nms = nms
+
+    def detect(self, frame):
+        h, w = frame.shape[:2]
+        blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0,
+                                     (300, 300), (104.0, 177.0, 123.0))
+        self.net.setInput(blob)
+        dets = postprocess_detections(self.net.forward(), w, h, conf=self.conf, nms=self.nms)
+        boxes = dets["box"].astype(np.float32)
+        boxes[:, 2:] -= boxes[:, :2]
+        return boxes
+
+
+def face_crop(gray, box, margin=0.1, size=CROP_SIZE):
+    """
+    Crop persegi di sekitar box (dipusatkan, diperlebar margin) lalu resize ke
+    size x size. res10 tidak memberi landmark, jadi normalisasi hanya posisi/skala.
+    """
+    x, y, w, h = box
+    side = max(w, h) * (1.0 + margin)
+    cx, cy = x + w / 2, y + h / 2
+    H, W = gray.shape[:2]
+    x1, y1 = int(max(0, cx - side / 2)), int(max(0, cy - side / 2))
+    x2, y2 = int(min(W, cx + side / 2)), int(min(H, cy + side / 2))
+    if x2 - x1 < 2 or y2 - y1 < 2:
+        return None
+    return cv2.resize(gray[y1:y2, x1:x2], (size, size), interpolation=cv2.INTER_AREA)
+
+
+class EmotionModel:
+    """Model Emotion DeepFace dengan predict batch; output vektor urut `keys`."""
+
+    def __init__(self, keys):
+        self.client = registry.emotion_model()  # dimuat + dipanaskan sekali per proses
+        self.order = np.array([DEEPFACE_EMOTIONS.index(k) for k in keys], dtype=np.intp)
+        self.calls = 0
+        self.faces = 0
+
+    def predict(self, crops):
+        """crops: list array uint8 48x48 -> (N, len(keys)) probabilitas."""
+        if not crops:
+            return np.zeros((0, len(self.order)), dtype=np.float32)
+        # format input client: BGR float [0, 1]; client mengubahnya lagi ke grayscale 48x48
+        batch = np.stack([cv2.cvtColor(c, cv2.COLOR_GRAY2BGR) for c in crops]).astype(np.float32) / 255.0
+        out = np.asarray(self.client.predict(batch), dtype=np.float32).reshape(-1, len(DEEPFACE_EMOTIONS))
+        if len(out) != len(crops):  # client lama hanya memprediksi wajah pertama per panggilan
+            out = np.stack([np.asarray(self.client.predict(b[None]), dtype=np.float32).reshape(-1)
+                            for b in batch])
+        self.calls += 1
+        self.faces += len(crops)
+        return out[:, self.order]
+
+
+class CropCache:
+    """
+    Crop terakhir yang dianalisis per track. Crop dianggap berubah jika
+    rata-rata selisih absolut piksel > diff_thresh, atau umurnya > ttl detik.
+    """
+
+    def __init__(self, diff_thresh=6.0, ttl=2.0):
+        self.diff_thresh = diff_thresh
+        self.ttl = ttl
+        self._crops = {}  # tid -> (crop, t)
+
+    def changed(self, tid, crop, t_now):
+        old = self._crops.get(tid)
+        if old is None or t_now - old[1] > self.ttl:
+            return True
+        return float(cv2.absdiff(crop, old[0]).mean()) > self.diff_thresh
+
+    def store(self, tid, crop, t_now):
+        self._crops[tid] = (crop, t_now)
+
+    def prune(self, alive_ids):
+        alive = set(alive_ids)
+        for tid in [tid for tid in self._crops if tid not in alive]:
+            del self._crops[tid]
+
+
+class TwoStageEmotion:
+    """Satu langkah: deteksi -> asosiasi track -> emosi batch untuk crop yang berubah."""
+
+    def __init__(self, keys, detector=None, model=None, cache=None):
+        self.detector = detector or FaceDetector()
+        self.model = model or EmotionModel(keys)
+        self.cache = cache or CropCache()
+
+    def step(self, frame, t_now, tracker, lock):
+        boxes = self.detector.detect(frame)
+        with lock:
+            tids = tracker.associate(boxes, t_now)
+            alive = tracker.ids.tolist()
+        self.cache.prune(alive)
+        if not tids:
+            return
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        todo, crops = [], []
+        for tid, box in zip(tids, boxes):
+            crop = face_crop(gray, box)
+            if crop is not None and self.cache.changed(tid, crop, t_now):
+                todo.append(tid)
+                crops.append(crop)
+        if not crops:
+            return
+        probs = self.model.predict(crops)
+        for tid, crop in zip(todo, crops):
+            self.cache.store(tid, crop, t_now)
+        with lock:
+            tracker.update_probs(todo, probs)
@@ -0,0 +1,232 @@
+"""
+Mode batch headless untuk mood_vision: skor emosi rekaman video tanpa GUI.
+
+Setiap video dipecah menjadi segmen (default 60 detik). Segmen dibagikan ke
+process pool; tiap worker memuat model DeepFace sendiri sekali (initializer),
+lalu menulis timeline emosi per track ke satu file NPZ per segmen:
+
+    <out>/<video>-<hash>-fps<fps>-<mode>/seg_<start>_<end>.npz
+        frame (int32), t (float64, detik video), track (int64),
+        box (N,4 float32 xywh), prob (N,7 float32, urut EMO_KEYS)
+
+Segmen yang file-nya sudah ada dilewati, jadi job yang terhenti cukup
+dijalankan ulang dengan argumen yang sama. Setting yang mengubah hasil (--fps,
+mode dua tahap / --analyze) ikut di nama folder, jadi run dengan setting lain
+tidak memakai ulang segmen lama. Setelah semua segmen selesai, hasil digabung
+ke <out>/<video>-<hash>-fps<fps>-<mode>.npz (id track dibuat unik per video).
+Tiap segmen memulai tracker sendiri; saat digabung, track di frame terakhir
+satu segmen disambung ke track di frame pertama segmen berikutnya jika box-nya
+overlap (IoU >= min_iou_match), jadi wajah yang sama tidak dapat id baru di
+setiap batas segmen. Wajah yang hilang tepat di batas segmen tetap dapat id baru.
+
+Jalankan:
+    python mood_batch.py rekaman/ sesi1.mp4 --out hasil --workers 8 --fps 5
+"""
+import argparse
+import hashlib
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+VIDEO_EXTS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+
+_worker = {}
+
+
+def find_videos(inputs):
+    videos = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                videos += [os.path.join(root, f) for f in sorted(files) if f.lower().endswith(VIDEO_EXTS)]
+        elif os.path.isfile(path):
+            videos.append(path)
+        else:
+            print(f"[WARN] Tidak ditemukan: {path}")
+    return videos
+
+
+def video_key(path):
+    """Nama folder output: nama file + hash path absolut (hindari tabrakan nama)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]}"
+
+
+def run_key(video, batch_fps, two_stage):
+    """video_key + setting yang mempengaruhi hasil (fps analisis, mode model)."""
+    return f"{video_key(video)}-fps{batch_fps:g}-{'stages' if two_stage else 'analyze'}"
+
+
+def plan_segments(videos, out_dir, segment_seconds, cfg):
+    """List task (video, fps, start, end, out_path) untuk semua video."""
+    tasks = []
+    for video in videos:
+        cap = cv2.VideoCapture(video)
+        n = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+        cap.release()
+        if n <= 0:
+            print(f"[WARN] Tidak bisa membaca jumlah frame: {video}")
+            continue
+        seg = max(1, int(round(segment_seconds * fps)))
+        seg_dir = os.path.join(out_dir, run_key(video, cfg["batch_fps"], cfg["two_stage"]))
+        for start in range(0, n, seg):
+            end = min(n, start + seg)
+            tasks.append((video, fps, start, end, os.path.join(seg_dir, f"seg_{start:08d}_{end:08d}.npz")))
+    return tasks
+
+
+def _init_worker(cfg):
+    """Dipanggil sekali per proses: muat model emosi milik worker ini."""
+    cv2.setNumThreads(1)  # satu core per worker, skala lewat jumlah proses
+    sys.path.insert(0, HERE)
+    import mood_vision as mv
+    mv.CFG.update(cfg)
+    _worker["mv"] = mv
+    if mv.CFG["two_stage"]:
+        from emotion_stages import TwoStageEmotion
+        _worker["stages"] = TwoStageEmotion(mv.EMO_KEYS)
+    else:
+        mv.registry.analyze_action("emotion", mv.CFG["detector_backend"])
+
+
+def _save_npz(path, **arrays):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp.npz"
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, path)  # file segmen hanya muncul jika lengkap
+
+
+def process_segment(task):
+    video, fps, start, end, out_path = task
+    mv, stages = _worker["mv"], _worker.get("stages")
+    if stages is not None:
+        # cache crop per segmen: id track mulai dari awal lagi di tracker baru,
+        # crop dari segmen/video lain tidak boleh dianggap "belum berubah"
+        from emotion_stages import CropCache
+        stages.cache = CropCache()
+    stride = max(1, int(round(fps / mv.CFG["batch_fps"]))) if mv.CFG["batch_fps"] > 0 else 1
+    tracker = mv.TrackManager(min_iou=mv.CFG["min_iou_match"], alpha=mv.CFG["ema_alpha"],
+                              max_predict=mv.CFG["max_predict"])
+    lock = threading.Lock()
+    rows = {"frame": [], "t": [], "track": [], "box": [], "prob": []}
+    t0 = time.perf_counter()
+
+    cap = cv2.VideoCapture(video)
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    for idx in range(start, end):
+        # grab() tanpa decode untuk frame yang tidak dianalisis
+        if (idx - start) % stride:
+            if not cap.grab():
+                break
+            continue
+        ret, frame = cap.read()
+        if not ret:
+            break
+        t = idx / fps
+        if stages is not None:
+            stages.step(frame, t, tracker, lock)
+        else:
+            tracker.match_and_update(mv.analyze_emotions(frame), t)
+        ids, boxes, probs = tracker.snapshot()
+        rows["frame"].append(np.full(len(ids), idx, dtype=np.int32))
+        rows["t"].append(np.full(len(ids), t, dtype=np.float64))
+        rows["track"].append(ids)
+        rows["box"].append(boxes)
+        rows["prob"].append(probs)
+    cap.release()
+
+    empty = {"frame": np.int32, "t": np.float64, "track": np.int64, "box": np.float32, "prob": np.float32}
+    shapes = {"box": (0, 4), "prob": (0, len(mv.EMO_KEYS))}
+    arrays = {k: np.concatenate(v) if v else np.zeros(shapes.get(k, (0,)), dtype=empty[k])
+              for k, v in rows.items()}
+    _save_npz(out_path, emotions=np.array(mv.EMO_KEYS), **arrays)
+    return out_path, end - start, time.perf_counter() - t0
+
+
+def merge_video(tasks, out_path, min_iou=None):
+    """
+    Gabung semua segmen satu video. Id track dibuat unik per video; track di
+    frame pertama segmen disambung ke track di frame terakhir segmen sebelumnya
+    jika IoU box >= min_iou (default CFG min_iou_match).
+    """
+    from mood_vision import CFG, assign_pairs, iou_matrix
+    min_iou = CFG["min_iou_match"] if min_iou is None else min_iou
+    parts, next_id = [], 0
+    prev = None  # (id global, box) di frame terakhir segmen sebelumnya
+    for task in sorted(tasks, key=lambda t: t[2]):
+        with np.load(task[4], allow_pickle=False) as d:
+            part = {k: d[k] for k in d.files}
+        mapping = {}
+        if prev is not None and len(part["frame"]):
+            first = part["frame"] == part["frame"].min()
+            ids0 = part["track"][first]
+            for di, ti in assign_pairs(iou_matrix(part["box"][first], prev[1]), min_iou):
+                mapping[int(ids0[di])] = int(prev[0][ti])
+        for tid in np.unique(part["track"]).tolist():
+            if tid not in mapping:
+                mapping[tid] = next_id
+                next_id += 1
+        part["track"] = np.array([mapping[t] for t in part["track"].tolist()], dtype=np.int64)
+        if len(part["frame"]):
+            last = part["frame"] == part["frame"].max()
+            prev = (part["track"][last], part["box"][last])
+        else:
+            prev = None
+        parts.append(part)
+    keys = ("frame", "t", "track", "box", "prob")
+    merged = {k: np.concatenate([p[k] for p in parts]) for k in keys}
+    _save_npz(out_path, emotions=parts[0]["emotions"], **merged)
+    return len(np.unique(merged["track"]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skor emosi video secara batch (tanpa GUI)")
+    parser.add_argument("inputs", nargs="+", help="file video atau folder")
+    parser.add_argument("--out", default="mood_out", help="folder output NPZ")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--segment-seconds", type=float, default=60.0)
+    parser.add_argument("--fps", type=float, default=5.0, help="frame dianalisis per detik video (0 = semua)")
+    parser.add_argument("--analyze", action="store_true", help="pakai DeepFace.analyze full-frame, bukan dua tahap")
+    parser.add_argument("--no-merge", action="store_true")
+    args = parser.parse_args()
+
+    cfg = {"two_stage": not args.analyze, "batch_fps": args.fps}
+    videos = find_videos(args.inputs)
+    tasks = plan_segments(videos, args.out, args.segment_seconds, cfg)
+    todo = [t for t in tasks if not os.path.exists(t[4])]
+    print(f"[INFO] {len(videos)} video, {len(tasks)} segmen, {len(tasks) - len(todo)} sudah selesai (resume)")
+
+    if todo:
+        if cfg["two_stage"]:
+            # unduh model res10 sekali di proses utama, bukan berebut di tiap worker
+            sys.path.insert(0, os.path.dirname(HERE))
+            from realtime_webcam_cv import download_models
+            download_models(os.path.join(os.path.dirname(HERE), "models"))
+        t0 = time.perf_counter()
+        frames = 0
+        # spawn: TensorFlow tidak aman di-fork, dan tiap worker memuat modelnya sendiri
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(min(args.workers, len(todo)), initializer=_init_worker, initargs=(cfg,)) as pool:
+            for i, (path, n, secs) in enumerate(pool.imap_unordered(process_segment, todo), 1):
+                frames += n
+                print(f"[{i}/{len(todo)}] {os.path.relpath(path, args.out)}: {n} frame, {secs:.1f}s")
+        elapsed = time.perf_counter() - t0
+        print(f"[INFO] {frames} frame video dalam {elapsed:.1f}s ({frames / max(elapsed, 1e-9):.1f} frame/s)")
+
+    if not args.no_merge:
+        for video in videos:
+            vt = [t for t in tasks if t[0] == video]
+            if vt and all(os.path.exists(t[4]) for t in vt):
+                out_path = os.path.join(args.out, run_key(video, cfg["batch_fps"], cfg["two_stage"]) + ".npz")
+                n_tracks = merge_video(vt, out_path)
+                print(f"[OK] {out_path}: {n_tracks} track")
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,23 @@
+import os
 import sys
-import subprocess
+
+# model_registry ada di root repo; diimpor paling awal (acuan waktu startup)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import model_registry as registry
 
 # ----------------------------
 # Auto-install dependencies
 # ----------------------------
-REQUIRED = [
-    "opencv-python",
-    "deepface",
-    "mediapipe",
-    "numpy",
-    "tf-keras"  # khusus untuk TensorFlow >= 2.16 yang dipakai DeepFace/RetinaFace
-]
+REQUIRED = {  # nama pip -> nama modul (dicek dengan find_spec, tanpa import)
+    "opencv-python": "cv2",
+    "deepface": "deepface",
+    "mediapipe": "mediapipe",
+    "numpy": "numpy",
+    "tf-keras": "tf_keras"  # khusus untuk TensorFlow >= 2.16 yang dipakai DeepFace/RetinaFace
+}
 
 def install_missing():
-    import importlib
-    for pkg in REQUIRED:
-        try:
-            importlib.import_module(pkg.split("==")[0].replace("-", "_"))
-        except ImportError:
-            print(f"[Installer] Menginstal: {pkg} ...")
-            subprocess.check_call([sys.executable, "-m", "pip", "install", pkg])
+    registry.install_missing(REQUIRED)
 
 install_missing()
 
@@ -28,19 +26,20 @@ install_missing()
 # ----------------------------
 import cv2
 import numpy as np
+import threading
 import time
-from collections import defaultdict
-from typing import List, Tuple, Dict
-from deepface import DeepFace
+
+from frame_pipeline import AsyncWorker, FramePipeline
 
 # --- Konfigurasi ---
 CFG = {
     "camera_index": 0,
     "width": 1280,
     "height": 720,
-    "frame_stride": 2,
     "ema_alpha": 0.7,
+    "max_predict": 0.5,   # detik maksimum box dipropagasi tanpa hasil model baru
     "min_iou_match": 0.3,
+    "two_stage": True,    # res10 + model emosi batch pada crop; False = DeepFace.analyze full-frame
     "detector_backend": "mediapipe",
     "align": True,
     "draw_bars": True,
@@ -63,6 +62,9 @@ EMO_EMOJI = {
     "neutral": "😐"
 }
 
+# urutan kolom vektor probabilitas emosi (sama dengan EMO_COLORS)
+EMO_KEYS = tuple(EMO_COLORS)
+
 # --- Utilitas ---
 def iou(boxA, boxB):
     xA = max(boxA[0], boxB[0])
@@ -76,50 +78,232 @@ def iou(boxA, boxB):
 def ensure_list(r):
     return r if isinstance(r, list) else [r]
 
-def softmax(d):
-    vals = np.array(list(d.values()), dtype=np.float32)
-    e = np.exp(vals - vals.max())
-    p = (e / e.sum()).tolist()
-    return {k: v for k, v in zip(d.keys(), p)}
+def emotion_vector(d):
+    """
+    Dict emosi DeepFace.analyze (persen, total 100) -> probabilitas float32 urut
+    EMO_KEYS, skala 0..1 yang sama dengan output model di jalur dua tahap.
+    """
+    v = np.array([d.get(k, 0.0) for k in EMO_KEYS], dtype=np.float32)
+    total = float(v.sum())
+    return v / total if total > 0 else v
+
+def topk_indices(probs, k=2):
+    """Index top-k per baris untuk semua track sekaligus: (N,7) -> (N,k), urut menurun."""
+    probs = np.atleast_2d(probs)
+    k = min(k, probs.shape[1])
+    return np.argsort(-probs, axis=1, kind="stable")[:, :k]
 
 def topk_items(prob, k=2):
-    return sorted(prob.items(), key=lambda x: x[1], reverse=True)[:k]
+    return [(EMO_KEYS[i], float(prob[i])) for i in topk_indices(prob, k)[0]]
+
+def iou_matrix(boxes_a, boxes_b):
+    """IoU semua pasangan box xywh: (D,4) x (T,4) -> (D,T), satu ekspresi NumPy."""
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)
+    ax1, ay1 = a[:, 0:1], a[:, 1:2]
+    ax2, ay2 = ax1 + a[:, 2:3], ay1 + a[:, 3:4]
+    bx1, by1 = b[:, 0], b[:, 1]
+    bx2, by2 = bx1 + b[:, 2], by1 + b[:, 3]
+    iw = np.clip(np.minimum(ax2, bx2) - np.maximum(ax1, bx1), 0, None)
+    ih = np.clip(np.minimum(ay2, by2) - np.maximum(ay1, by1), 0, None)
+    inter = iw * ih
+    return inter / (a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter + 1e-6)
+
+def _min_cost_assignment(cost):
+    """
+    Hungarian (potensial u/v, O(n^2 m)) untuk matrix biaya (n, m) dengan n <= m:
+    return kolom untuk tiap baris dengan total biaya minimum.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.intp)  # baris (1-based) pemilik kolom j; kolom 0 = semu
+    way = np.zeros(m + 1, dtype=np.intp)
+    for i in range(1, n + 1):
+        owner[0], j0 = i, 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used
+            free[0] = False
+            cur = np.full(m + 1, np.inf)
+            cur[1:] = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (cur < minv)
+            minv[better] = cur[better]
+            way[better] = j0
+            j1 = int(np.argmin(np.where(free, minv, np.inf)))
+            delta = minv[j1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    cols = np.zeros(n, dtype=np.intp)
+    cols[owner[1:][owner[1:] > 0] - 1] = np.nonzero(owner[1:])[0]
+    return cols
+
+def assign_pairs(iou_m, min_iou):
+    """
+    Pasangan (det, track) dengan total IoU maksimum (Hungarian, tanpa scipy).
+    Pasangan < min_iou di-mask sebelum dipecahkan (nilainya sama dengan tidak
+    dipasangkan), jadi tidak bisa menggeser pasangan yang valid.
+    """
+    iou_m = np.asarray(iou_m, dtype=np.float64)
+    valid = iou_m >= min_iou
+    if not valid.any():
+        return []
+    gain = np.where(valid, iou_m, 0.0)
+    if gain.shape[0] <= gain.shape[1]:
+        rows = np.arange(gain.shape[0])
+        cols = _min_cost_assignment(-gain)
+    else:
+        cols = np.arange(gain.shape[1])
+        rows = _min_cost_assignment(-gain.T)
+    keep = valid[rows, cols]
+    return sorted(zip(rows[keep].tolist(), cols[keep].tolist()))
+
+def check_assign_pairs(trials=2000, seed=0):
+    """assign_pairs vs brute force (semua permutasi) pada matrix IoU acak kecil."""
+    import itertools
+    # kasus silang: greedy hanya memberi (0,0), optimal (0,1) + (1,0)
+    crossing = assign_pairs(np.array([[0.9, 0.8], [0.85, 0.1]]), 0.3)
+    assert crossing == [(0, 1), (1, 0)], crossing
+    rng = np.random.default_rng(seed)
+    for _ in range(trials):
+        d, t = (int(n) for n in rng.integers(1, 6, size=2))
+        iou_m = rng.random((d, t)) * (rng.random((d, t)) < 0.7)
+        min_iou = float(rng.choice([0.0, 0.3, 0.5]))
+        gain = np.where(iou_m >= min_iou, iou_m, 0.0)
+        best = 0.0
+        for perm in itertools.permutations(range(max(d, t)), min(d, t)):
+            pairs = zip(range(d), perm) if d <= t else zip(perm, range(t))
+            best = max(best, sum(gain[i, j] for i, j in pairs))
+        pairs = assign_pairs(iou_m, min_iou)
+        assert len({i for i, _ in pairs}) == len({j for _, j in pairs}) == len(pairs)
+        assert all(iou_m[i, j] >= min_iou for i, j in pairs)
+        got = sum(iou_m[i, j] for i, j in pairs)
+        assert abs(got - best) < 1e-9, (iou_m, min_iou, pairs, got, best)
+    print(f"[INFO] assign_pairs: {trials} matrix acak + kasus silang cocok dengan brute force")
 
 # --- Tracking ---
 class TrackManager:
-    def __init__(self, min_iou=0.3, alpha=0.7):
+    """
+    State track disimpan sebagai array sejajar (ids, boxes, vel, last_t, probs).
+
+    boxes adalah posisi saat deteksi terakhir (last_t); vel (px/detik) dipakai
+    predict() untuk memajukan box di antara hasil model yang datang terlambat.
+    """
+
+    def __init__(self, min_iou=0.3, alpha=0.7, max_age=2.0, max_predict=0.5, vel_alpha=0.5):
         self.next_id = 1
-        self.tracks = {}
         self.min_iou = min_iou
         self.alpha = alpha
+        self.max_age = max_age
+        self.max_predict = max_predict
+        self.vel_alpha = vel_alpha
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.boxes = np.zeros((0, 4), dtype=np.float32)
+        self.vel = np.zeros((0, 4), dtype=np.float32)
+        self.last_t = np.zeros(0, dtype=np.float64)
+        self.probs = np.zeros((0, len(EMO_KEYS)), dtype=np.float32)
+        self.scored = np.zeros(0, dtype=bool)  # sudah punya hasil model emosi
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def tracks(self):
+        return {int(tid): {"box": self.boxes[i].tolist(), "prob": self.probs[i], "last_t": float(self.last_t[i])}
+                for i, tid in enumerate(self.ids)}
+
+    def items(self):
+        for i, tid in enumerate(self.ids):
+            yield int(tid), self.boxes[i].tolist(), self.probs[i]
+
+    def predict(self, t_now):
+        """Box semua track dimajukan ke t_now dengan kecepatan konstan."""
+        dt = np.clip(t_now - self.last_t, 0.0, self.max_predict).astype(np.float32)
+        return self.boxes + self.vel * dt[:, None]
+
+    def snapshot(self, t_now=None):
+        """Salinan (ids, boxes, probs) track yang sudah dinilai, untuk thread lain atau log."""
+        boxes = self.boxes if t_now is None else self.predict(t_now)
+        keep = self.scored
+        return self.ids[keep], boxes[keep], self.probs[keep]
+
+    def associate(self, det_boxes, t_now):
+        """
+        Cocokkan box deteksi ke track (update box + kecepatan), buat track baru
+        untuk box yang tidak cocok, hapus track kedaluwarsa. Return id track per box.
+        """
+        det_boxes = np.asarray(det_boxes, dtype=np.float32).reshape(-1, 4)
+        # cocokkan ke posisi prediksi pada waktu frame deteksi diambil
+        pairs = assign_pairs(iou_matrix(det_boxes, self.predict(t_now)), self.min_iou)
+        det_ids = np.zeros(len(det_boxes), dtype=np.int64)
+        if pairs:
+            d_idx, t_idx = (np.array(v, dtype=np.intp) for v in zip(*pairs))
+            dt = (t_now - self.last_t[t_idx]).astype(np.float32)
+            moving = dt > 1e-3
+            v_new = (det_boxes[d_idx] - self.boxes[t_idx]) / np.maximum(dt, 1e-3)[:, None]
+            self.vel[t_idx] = np.where(moving[:, None],
+                                       self.vel_alpha * self.vel[t_idx] + (1 - self.vel_alpha) * v_new,
+                                       self.vel[t_idx])
+            self.boxes[t_idx] = det_boxes[d_idx]
+            self.last_t[t_idx] = t_now
+            det_ids[d_idx] = self.ids[t_idx]
+
+        matched = {d for d, _ in pairs}
+        new_d = [d for d in range(len(det_boxes)) if d not in matched]
+        if new_d:
+            new_ids = np.arange(self.next_id, self.next_id + len(new_d), dtype=np.int64)
+            self.next_id += len(new_d)
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.boxes = np.concatenate([self.boxes, det_boxes[new_d]])
+            self.vel = np.concatenate([self.vel, np.zeros((len(new_d), 4), dtype=np.float32)])
+            self.last_t = np.concatenate([self.last_t, np.full(len(new_d), t_now)])
+            self.probs = np.concatenate([self.probs, np.zeros((len(new_d), len(EMO_KEYS)), dtype=np.float32)])
+            self.scored = np.concatenate([self.scored, np.zeros(len(new_d), dtype=bool)])
+            det_ids[new_d] = new_ids
+
+        alive = (t_now - self.last_t) <= self.max_age
+        if not alive.all():
+            self.ids, self.boxes, self.last_t = self.ids[alive], self.boxes[alive], self.last_t[alive]
+            self.probs, self.vel, self.scored = self.probs[alive], self.vel[alive], self.scored[alive]
+        return det_ids.tolist()
+
+    def update_probs(self, track_ids, probs):
+        """EMA probabilitas untuk track_ids (track yang baru dinilai langsung diisi)."""
+        if len(track_ids) == 0 or len(self.ids) == 0:
+            return
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        rows = np.searchsorted(self.ids, track_ids)  # ids selalu urut naik
+        ok = (rows < len(self.ids)) & (self.ids[np.minimum(rows, len(self.ids) - 1)] == track_ids)
+        rows, probs = rows[ok], np.asarray(probs, dtype=np.float32)[ok]
+        # EMA semua track dalam satu operasi
+        fresh = ~self.scored[rows]
+        self.probs[rows] = np.where(fresh[:, None], probs,
+                                    self.alpha * self.probs[rows] + (1 - self.alpha) * probs)
+        self.scored[rows] = True
 
     def match_and_update(self, dets, t_now):
-        assigned = set()
-        updates = {}
-        for det in dets:
-            best_iou, best_id = 0, None
-            for tid, tr in self.tracks.items():
-                i = iou(det["box"], tr["box"])
-                if i > best_iou and i >= self.min_iou and tid not in assigned:
-                    best_iou, best_id = i, tid
-            if best_id is None:
-                tid = self.next_id; self.next_id += 1
-                self.tracks[tid] = {"box": det["box"], "prob": det["prob"], "last_t": t_now}
-                assigned.add(tid); updates[tid] = self.tracks[tid]
-            else:
-                old = self.tracks[best_id]["prob"]
-                new_prob = {k: self.alpha*old.get(k,0)+(1-self.alpha)*det["prob"].get(k,0)
-                            for k in set(old)|set(det["prob"])}
-                self.tracks[best_id].update({"box": det["box"], "prob": new_prob, "last_t": t_now})
-                assigned.add(best_id); updates[best_id] = self.tracks[best_id]
-        for tid in [tid for tid,tr in self.tracks.items() if t_now - tr["last_t"] > 2]:
-            del self.tracks[tid]
-        return updates
+        det_ids = self.associate([d["box"] for d in dets], t_now)
+        self.update_probs(det_ids, [d["prob"] for d in dets])
+        updated = set(det_ids)
+        return {tid: {"box": box, "prob": prob} for tid, box, prob in self.items() if tid in updated}
 
 # --- Visual ---
-def draw_overlay(frame, tid, box, prob, topk=2, draw_bars=True):
+def draw_overlay(frame, tid, box, prob, top=None, draw_bars=True):
+    """prob: vektor urut EMO_KEYS; top: index top-k yang sudah dihitung (opsional)."""
     x, y, w, h = box; x1, y1 = int(x), int(y); x2, y2 = int(x+w), int(y+h)
-    emo_main, p_main = topk_items(prob, k=topk)[0]
+    i_main = int(top[0]) if top is not None else int(np.argmax(prob))
+    emo_main, p_main = EMO_KEYS[i_main], float(prob[i_main])
     color = EMO_COLORS.get(emo_main, (255,255,255))
     cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
     label = f"ID {tid} {EMO_EMOJI.get(emo_main,'')} {emo_main} {p_main*100:.1f}%"
@@ -127,43 +311,90 @@ def draw_overlay(frame, tid, box, prob, topk=2, draw_bars=True):
     cv2.rectangle(frame, (x1, y1-th-10), (x1+tw+10, y1), color, -1)
     cv2.putText(frame, label, (x1+5, y1-5), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,0), 2)
     if draw_bars:
-        bar_x = x1 - 12; keys = list(EMO_COLORS.keys()); step = max(1, h//(2*len(keys)))
-        for i, k in enumerate(keys):
-            p = float(prob.get(k, 0.0)); length = int(6 * p)
+        bar_x = x1 - 12; step = max(1, int(h)//(2*len(EMO_KEYS)))
+        lengths = (6 * prob).astype(np.int32)
+        for i, k in enumerate(EMO_KEYS):
+            length = int(lengths[i])
             by = y1 + i * step
             cv2.rectangle(frame, (bar_x, by), (bar_x + length, by + step - 1), EMO_COLORS[k], -1)
 
 # --- Main ---
+def analyze_emotions(frame):
+    """DeepFace.analyze satu frame -> list det {"box", "prob"} (prob vektor EMO_KEYS)."""
+    dets = []
+    res = registry.deepface().analyze(frame, actions=["emotion"], detector_backend=CFG["detector_backend"],
+                           enforce_detection=False, align=CFG["align"], silent=True)
+    for r in ensure_list(res):
+        region = r.get("region", {})
+        x, y, w_box, h_box = map(int, [region.get("x",0), region.get("y",0), region.get("w",0), region.get("h",0)])
+        if w_box>0 and h_box>0:
+            prob = emotion_vector(r.get("emotion", {}))
+            dets.append({"box":[x,y,w_box,h_box], "prob":prob})
+    return dets
+
 def main():
     cap = cv2.VideoCapture(CFG["camera_index"])
     cap.set(cv2.CAP_PROP_FRAME_WIDTH, CFG["width"])
     cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CFG["height"])
     if not cap.isOpened():
         print("Kamera tidak terbuka."); return
-    tracker = TrackManager(min_iou=CFG["min_iou_match"], alpha=CFG["ema_alpha"])
-    t0 = time.time(); frames = 0; fps = 0
-    while True:
-        ok, frame = cap.read()
-        if not ok: break
-        frames += 1; t_now = time.time(); dets = []
-        if frames % CFG["frame_stride"] == 0:
-            try:
-                res = DeepFace.analyze(frame, actions=["emotion"], detector_backend=CFG["detector_backend"],
-                                       enforce_detection=False, align=CFG["align"], silent=True)
-                for r in ensure_list(res):
-                    region = r.get("region", {})
-                    x, y, w_box, h_box = map(int, [region.get("x",0), region.get("y",0), region.get("w",0), region.get("h",0)])
-                    if w_box>0 and h_box>0:
-                        prob = softmax(r.get("emotion", {}))
-                        dets.append({"box":[x,y,w_box,h_box], "prob":prob})
-            except Exception as e:
-                pass
-        tracker.match_and_update(dets, t_now)
-        for tid, st in tracker.tracks.items():
-            draw_overlay(frame, tid, st["box"], st["prob"], topk=CFG["topk"], draw_bars=CFG["draw_bars"])
-        if frames % 10 == 0:
-            t1 = time.time(); fps = 10/(t1-t0); t0 = t1
-        cv2.putText(frame, f"FPS {fps:.1f}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2)
-        cv2.imshow("Mood Vision Auto", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'): break
-    cap.release(); cv2.destroyAllWindows
\ No newline at end of file
+    tracker = TrackManager(min_iou=CFG["min_iou_match"], alpha=CFG["ema_alpha"],
+                           max_predict=CFG["max_predict"])
+    lock = threading.Lock()
+
+    # Hasil model digabung ke tracker begitu tersedia, pakai waktu frame
+    # yang dianalisis (bukan waktu selesai) supaya kecepatan box benar.
+    # model dimuat + dipanaskan sebelum kamera jalan, bukan di frame pertama
+    if CFG["two_stage"]:
+        from emotion_stages import TwoStageEmotion
+        stages = TwoStageEmotion(EMO_KEYS)
+
+        def infer(item):
+            t_frame, frame = item
+            stages.step(frame, t_frame, tracker, lock)
+    else:
+        stages = None
+        registry.analyze_action("emotion", CFG["detector_backend"])
+
+        def infer(item):
+            t_frame, frame = item
+            dets = analyze_emotions(frame)
+            with lock:
+                tracker.match_and_update(dets, t_frame)
+
+    worker = AsyncWorker(infer).start()
+
+    # Thread process hanya menyerahkan frame ke worker dan memprediksi box,
+    # jadi FPS tampilan tidak lagi tergantung latency DeepFace.
+    def process(frame):
+        t_now = time.time()
+        worker.submit((t_now, frame.copy()))  # render menggambar langsung di frame
+        with lock:
+            return tracker.snapshot(t_now)
+
+    def render(frame, tracks):
+        ids, boxes, probs = tracks
+        tops = topk_indices(probs, CFG["topk"])
+        for tid, box, prob, top in zip(ids.tolist(), boxes.tolist(), probs, tops):
+            draw_overlay(frame, tid, box, prob, top=top, draw_bars=CFG["draw_bars"])
+        cv2.putText(frame, f"FPS {pipeline.stats.fps():.1f}  model {worker.stats.fps:.1f}/s",
+                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (255,255,255), 2)
+        if len(ids):
+            registry.first_frame("mood_vision")
+        return frame
+
+    pipeline = FramePipeline(cap, process, render, window_name="Mood Vision Auto")
+    try:
+        pipeline.run()
+    finally:
+        worker.stop()
+        print(f"[INFO] Model: {worker.stats.count} inferensi, {worker.stats.latency_ms:.0f}ms rata-rata, "
+              f"{worker.dropped} frame dilewati")
+        if stages is not None:
+            print(f"[INFO] Emotion: {stages.model.calls} batch, {stages.model.faces} crop dianalisis")
+
+if __name__ == "__main__":
+    if "--check" in sys.argv[1:]:
+        check_assign_pairs()
+    else:
+        main()
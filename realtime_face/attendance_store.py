@@ -0,0 +1,102 @@
+"""
+Log absensi append-only dengan dedup di memori.
+
+- File dirotasi per hari: attendance_YYYY-MM-DD.csv (kolom Name, Emotion, Time).
+- Nama yang sudah absen hari ini disimpan di set, jadi cek duplikat O(1)
+  tanpa membaca ulang file.
+- Penulisan dilakukan thread writer terpisah (buffered append + fsync
+  berkala), sehingga thread video tidak pernah menunggu disk.
+"""
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+HEADER = ["Name", "Emotion", "Time"]
+
+
+class AttendanceStore:
+    def __init__(self, log_dir=".", prefix="attendance", fsync_every=5.0):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.fsync_every = fsync_every
+        self._day = None
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, daemon=True)
+        os.makedirs(log_dir, exist_ok=True)
+        self._roll(datetime.now())
+        self._writer.start()
+
+    def path_for(self, day):
+        return os.path.join(self.log_dir, f"{self.prefix}_{day}.csv")
+
+    def _roll(self, now):
+        """Ganti hari: muat nama yang sudah tercatat di file hari ini (sekali saja)."""
+        day = now.strftime("%Y-%m-%d")
+        if day == self._day:
+            return
+        self._day = day
+        self._seen = set()
+        path = self.path_for(day)
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                self._seen = {row["Name"] for row in csv.DictReader(f) if row.get("Name")}
+
+    def mark(self, name, emotion):
+        """Catat absensi jika nama belum tercatat hari ini. Return True jika baru."""
+        name = name.strip()
+        now = datetime.now()
+        with self._lock:
+            self._roll(now)
+            if name in self._seen:
+                return False
+            self._seen.add(name)
+            day = self._day
+        stamp = now.strftime("%Y-%m-%d %H:%M:%S")
+        self._queue.put((day, [name, emotion, stamp]))
+        print(f"[LOG] Attendance: {name} - {emotion} - {stamp}")
+        return True
+
+    def _write_loop(self):
+        f = writer = day = None
+        dirty = False
+        last_sync = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_every)
+            except queue.Empty:
+                item = None
+            if item is StopIteration:
+                break
+            if item is not None:
+                row_day, row = item
+                if row_day != day:
+                    if f is not None:
+                        f.close()
+                    day = row_day
+                    path = self.path_for(day)
+                    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+                    f = open(path, "a", newline="", encoding="utf-8")
+                    writer = csv.writer(f)
+                    if new_file:
+                        writer.writerow(HEADER)
+                writer.writerow(row)
+                dirty = True
+            if dirty and (item is None or time.monotonic() - last_sync >= self.fsync_every):
+                f.flush()
+                os.fsync(f.fileno())
+                dirty = False
+                last_sync = time.monotonic()
+        if f is not None:
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+
+    def close(self):
+        """Flush semua baris yang tertunda lalu hentikan writer."""
+        self._queue.put(StopIteration)
+        self._writer.join(timeout=5.0)
@@ -0,0 +1,122 @@
+"""
+Index embedding wajah untuk mode absensi.
+
+Setiap wajah terdaftar di-embed sekali (saat register_face atau saat sync
+pertama kali) dan disimpan sebagai matrix float32 ternormalisasi di satu file
+.npz. Saat runtime, tiap crop wajah cukup di-embed sekali lalu dicocokkan ke
+seluruh galeri dengan satu perkalian matrix (cosine similarity), jadi jumlah
+panggilan model per wajah tetap 1 berapa pun jumlah orang terdaftar.
+"""
+import os
+import threading
+
+import sys
+
+import cv2
+import numpy as np
+
+# model_registry ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import model_registry as registry
+
+MODEL_NAME = "VGG-Face"        # sama dengan default DeepFace.verify
+DISTANCE_THRESHOLD = 0.68      # ambang cosine distance default DeepFace untuk VGG-Face
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+
+def _normalize(v):
+    v = np.asarray(v, dtype=np.float32)
+    return v / (np.linalg.norm(v, axis=-1, keepdims=True) + 1e-10)
+
+
+class FaceGallery:
+    def __init__(self, face_dir, path=None, model_name=MODEL_NAME, threshold=DISTANCE_THRESHOLD):
+        self.face_dir = face_dir
+        self.path = path or os.path.join(face_dir, "gallery.npz")
+        self.model_name = model_name
+        self.threshold = threshold
+        self.names = []
+        self.files = []
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+        self.load()
+
+    def __len__(self):
+        return len(self.names)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        with np.load(self.path, allow_pickle=False) as data:
+            if str(data["model_name"]) != self.model_name:
+                print(f"[WARN] Galeri {self.path} dibuat dengan model {data['model_name']}, di-embed ulang.")
+                return
+            self.names = data["names"].tolist()
+            self.files = data["files"].tolist()
+            self.vectors = data["vectors"].astype(np.float32)
+
+    def save(self):
+        tmp = self.path + ".tmp.npz"
+        np.savez(tmp, names=np.array(self.names, dtype=str), files=np.array(self.files, dtype=str),
+                 vectors=self.vectors, model_name=np.array(self.model_name))
+        os.replace(tmp, self.path)
+
+    def embed(self, img, detect=False):
+        """
+        Embedding ternormalisasi untuk satu gambar. detect=False untuk crop
+        wajah yang sudah jadi (lewati detektor), True untuk foto penuh.
+        """
+        reps = registry.deepface().represent(img, model_name=self.model_name, enforce_detection=False,
+                                  detector_backend="opencv" if detect else "skip")
+        if not reps:
+            return None
+        # foto registrasi bisa berisi lebih dari satu wajah: ambil yang terbesar
+        best = max(reps, key=lambda r: r.get("facial_area", {}).get("w", 0) * r.get("facial_area", {}).get("h", 0))
+        return _normalize(best["embedding"])
+
+    def add(self, name, img, file=""):
+        vec = self.embed(img, detect=True)
+        if vec is None:
+            print(f"[WARN] Wajah {name} tidak bisa di-embed.")
+            return False
+        with self._lock:
+            if file and file in self.files:
+                # registrasi ulang dengan file yang sama: ganti baris lama
+                i = self.files.index(file)
+                self.vectors[i] = vec
+                self.names[i] = name
+            elif self.vectors.size == 0:
+                self.vectors = vec[None, :]
+                self.names.append(name)
+                self.files.append(file)
+            else:
+                self.vectors = np.vstack([self.vectors, vec[None, :]])
+                self.names.append(name)
+                self.files.append(file)
+            self.save()
+        print(f"[OK] {name} ditambahkan ke galeri ({len(self)} wajah).")
+        return True
+
+    def sync(self):
+        """Embed gambar di face_dir yang belum ada di galeri (mis. hasil registrasi lama)."""
+        known = set(self.files)
+        for file in sorted(os.listdir(self.face_dir)):
+            if not file.lower().endswith(IMAGE_EXTS) or file in known:
+                continue
+            img = cv2.imread(os.path.join(self.face_dir, file))
+            if img is not None:
+                self.add(os.path.splitext(file)[0], img, file=file)
+
+    def match(self, face_crop):
+        """Return (name, distance) wajah terdekat, atau ("Unknown", distance) di atas ambang."""
+        if len(self) == 0 or face_crop is None or face_crop.size == 0:
+            return "Unknown", 1.0
+        vec = self.embed(face_crop)
+        if vec is None:
+            return "Unknown", 1.0
+        with self._lock:
+            sims = self.vectors @ vec
+            i = int(np.argmax(sims))
+            dist = 1.0 - float(sims[i])
+            name = self.names[i]
+        return (name if dist <= self.threshold else "Unknown"), dist
@@ -1,29 +1,35 @@
-import cv2
 import os
-import pandas as pd
-from datetime import datetime
-from deepface import DeepFace
+import sys
+
+# frame_pipeline & model_registry ada di root repo
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import model_registry as registry
 
-ATTENDANCE_FILE = "attendance.csv"
+import cv2
+import time
+from frame_pipeline import FramePipeline
+from face_gallery import FaceGallery
+from attendance_store import AttendanceStore
+from recognition_tracker import RecognitionTracker
+
+ATTENDANCE_DIR = "."  # file harian: attendance_YYYY-MM-DD.csv
 FACE_DIR = "faces"
+DETECTOR_BACKEND = "opencv"  # default DeepFace.analyze
 
-<<<<<<< HEAD
-=======
 # Buat folder wajah jika belum ada
->>>>>>> 0d28b7cc1074ad40ab8e9b5df0921e8f4e69c8e0
 os.makedirs(FACE_DIR, exist_ok=True)
 
-def mark_attendance(name, emotion):
-    if not os.path.exists(ATTENDANCE_FILE):
-        pd.DataFrame(columns=["Name", "Emotion", "Time"]).to_csv(ATTENDANCE_FILE, index=False)
+_store = None
 
-    df = pd.read_csv(ATTENDANCE_FILE)
-    if name.strip() not in df["Name"].values:
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = {"Name": name.strip(), "Emotion": emotion, "Time": now}
-        df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-        df.to_csv(ATTENDANCE_FILE, index=False)
-        print(f"[LOG] Attendance: {name} - {emotion} - {now}")
+def get_store():
+    global _store
+    if _store is None:
+        _store = AttendanceStore(ATTENDANCE_DIR)
+    return _store
+
+def mark_attendance(name, emotion):
+    # dedup di memori + append di thread writer, tidak ada baca/tulis ulang CSV
+    get_store().mark(name, emotion)
 
 def register_face():
     name = input("Masukkan nama Anda: ").strip()
@@ -43,6 +49,8 @@ def register_face():
         if key == ord("s"):
             cv2.imwrite(save_path, frame)
             print(f"[SAVED] Wajah {name} tersimpan di {save_path}")
+            # embed sekali di sini, bukan setiap frame saat absensi
+            FaceGallery(FACE_DIR).add(name, frame, file=os.path.basename(save_path))
             break
         elif key == ord("q"):
             break
@@ -50,61 +58,74 @@ def register_face():
     cap.release()
     cv2.destroyAllWindows()
 
+def detect_boxes(frame):
+    """Deteksi wajah saja (tanpa emosi/embedding): list (x, y, w, h)."""
+    faces = registry.deepface().extract_faces(frame, detector_backend=DETECTOR_BACKEND,
+                                   enforce_detection=False, align=False)
+    boxes = []
+    for f in faces:
+        area = f.get("facial_area", {})
+        # tanpa wajah, enforce_detection=False mengembalikan seluruh frame dgn confidence 0
+        if f.get("confidence", 1) <= 0:
+            continue
+        boxes.append((area.get("x", 0), area.get("y", 0), area.get("w", 0), area.get("h", 0)))
+    return boxes
+
+def recognize_faces(frame, gallery, tracker):
+    """
+    Deteksi + tracking tiap frame; nama dan emosi diambil dari cache track
+    dan hanya dihitung ulang saat track baru, match lemah, atau TTL habis.
+    """
+    faces = []
+    try:
+        t_now = time.time()
+        for tid, tr in tracker.update(detect_boxes(frame), t_now):
+            x, y, w, h = tr["box"]
+            face_crop = frame[y:y+h, x:x+w]
+
+            if tracker.needs_identity(tr, t_now):
+                # satu embedding + satu query ke galeri
+                name, dist = gallery.match(face_crop)
+                tracker.set_identity(tr, name, dist, t_now)
+
+            if tracker.needs_emotion(tr, t_now):
+                res = registry.deepface().analyze(face_crop, actions=["emotion"], detector_backend="skip",
+                                       enforce_detection=False, silent=True)
+                res = res[0] if isinstance(res, list) else res
+                tracker.set_emotion(tr, res.get("dominant_emotion", "neutral"), t_now)
+
+            mark_attendance(tr["name"], tr["emotion"])
+            faces.append((x, y, w, h, tr["name"], tr["emotion"]))
+
+    except Exception as e:
+        print("[INFO] Tidak ada wajah:", e)
+    return faces
+
+def draw_faces(frame, faces):
+    for x, y, w, h, name, dominant_emotion in faces:
+        cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+        cv2.putText(frame, f"{name} - {dominant_emotion}",
+                    (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX,
+                    0.7, (0, 255, 0), 2)
+    if faces:
+        registry.first_frame("attendance")
+    return frame
+
 def attendance_mode():
-    cap = cv2.VideoCapture(0)
+    gallery = FaceGallery(FACE_DIR)
+    gallery.sync()
+    print(f"[INFO] {len(gallery)} wajah terdaftar di galeri")
+    # muat + panaskan semua model sebelum kamera dibuka
+    registry.face_detector(DETECTOR_BACKEND)
+    registry.recognition_model(gallery.model_name)
+    registry.analyze_action("emotion", "skip")
     print("[INFO] Tekan 'q' untuk keluar")
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        try:
-            results = DeepFace.analyze(frame, actions=["emotion"], enforce_detection=False)
-            if not isinstance(results, list):
-                results = [results]
-
-            for res in results:
-                region = res.get("region", {})
-                x = region.get("x", 0)
-                y = region.get("y", 0)
-                w = region.get("w", 0)
-                h = region.get("h", 0)
-                dominant_emotion = res.get("dominant_emotion", "neutral")
-
-                # default
-                name = "Unknown"
-
-                # Crop wajah dari frame
-                face_crop = frame[y:y+h, x:x+w]
-
-                for file in os.listdir(FACE_DIR):
-                    db_face_path = os.path.join(FACE_DIR, file)
-                    try:
-                        verify = DeepFace.verify(face_crop, db_face_path, enforce_detection=False)
-                        if verify.get("verified", False):
-                            name = os.path.splitext(file)[0]
-                            break
-                    except Exception as e:
-                        print(f"[WARN] Verifikasi gagal dengan {file}: {e}")
-                        continue
-
-                mark_attendance(name, dominant_emotion)
-
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, f"{name} - {dominant_emotion}",
-                            (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX,
-                            0.7, (0, 255, 0), 2)
-
-        except Exception as e:
-            print("[INFO] Tidak ada wajah:", e)
-
-        cv2.imshow("Attendance Mode", frame)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+    # DeepFace di thread process, kamera & tampilan tidak ikut tertahan
+    tracker = RecognitionTracker()
+    FramePipeline(0, lambda frame: recognize_faces(frame, gallery, tracker), draw_faces,
+                  window_name="Attendance Mode").run()
+    get_store().close()
+    print(f"[INFO] Identifikasi: {tracker.identify_calls}x, analisis emosi: {tracker.emotion_calls}x")
 
 if __name__ == "__main__":
     print("1. Register Face")
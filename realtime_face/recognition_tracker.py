@@ -0,0 +1,107 @@
+"""
+Tracking wajah lintas frame dengan cache hasil identifikasi per track.
+
+Setiap box wajah dicocokkan ke track yang ada (IoU, lalu jarak centroid
+sebagai cadangan) supaya ID track stabil. Nama dan emosi terakhir disimpan
+per track; identifikasi ulang hanya dilakukan saat track baru lahir, saat
+kecocokan masih lemah (Unknown / jarak di atas ambang yakin), atau setelah
+TTL habis. Orang yang lewat di depan kamera cukup diidentifikasi sekali-dua kali.
+"""
+import itertools
+
+
+def box_iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (aw * ah + bw * bh - inter + 1e-6)
+
+
+class RecognitionTracker:
+    """
+    min_iou       : IoU minimum agar box dianggap track yang sama
+    max_center    : jarak centroid maksimum (relatif lebar box) jika IoU gagal
+    max_age       : detik tanpa deteksi sebelum track dihapus
+    identity_ttl  : detik sebelum nama yang sudah yakin dicek ulang
+    emotion_ttl   : detik sebelum emosi dianalisis ulang
+    confident_dist: jarak embedding maksimum agar nama dianggap yakin
+    retry_every   : detik jeda identifikasi ulang untuk track yang belum yakin
+    """
+
+    def __init__(self, min_iou=0.3, max_center=0.5, max_age=1.0, identity_ttl=10.0,
+                 emotion_ttl=1.0, confident_dist=0.45, retry_every=0.5):
+        self.min_iou = min_iou
+        self.max_center = max_center
+        self.max_age = max_age
+        self.identity_ttl = identity_ttl
+        self.emotion_ttl = emotion_ttl
+        self.confident_dist = confident_dist
+        self.retry_every = retry_every
+        self.tracks = {}
+        self._ids = itertools.count(1)
+        self.identify_calls = 0
+        self.emotion_calls = 0
+
+    def _center_dist(self, a, b):
+        acx, acy = a[0] + a[2] / 2, a[1] + a[3] / 2
+        bcx, bcy = b[0] + b[2] / 2, b[1] + b[3] / 2
+        return ((acx - bcx) ** 2 + (acy - bcy) ** 2) ** 0.5 / max(1.0, b[2])
+
+    def update(self, boxes, t_now):
+        """Cocokkan box ke track; return list (tid, track) untuk box frame ini."""
+        pairs = []
+        for di, box in enumerate(boxes):
+            for tid, tr in self.tracks.items():
+                iou = box_iou(box, tr["box"])
+                if iou >= self.min_iou:
+                    pairs.append((1.0 + iou, di, tid))
+                else:
+                    d = self._center_dist(box, tr["box"])
+                    if d <= self.max_center:
+                        pairs.append((1.0 - d, di, tid))
+        # greedy: pasangan terbaik dulu (IoU selalu mengalahkan centroid)
+        pairs.sort(reverse=True)
+        used_d, used_t, match = set(), set(), {}
+        for _, di, tid in pairs:
+            if di in used_d or tid in used_t:
+                continue
+            used_d.add(di); used_t.add(tid); match[di] = tid
+
+        out = []
+        for di, box in enumerate(boxes):
+            tid = match.get(di)
+            if tid is None:
+                tid = next(self._ids)
+                self.tracks[tid] = {"box": box, "name": None, "dist": 1.0, "emotion": None,
+                                    "born_t": t_now, "id_t": None, "emo_t": None}
+            tr = self.tracks[tid]
+            tr["box"] = box
+            tr["last_t"] = t_now
+            out.append((tid, tr))
+
+        for tid in [tid for tid, tr in self.tracks.items() if t_now - tr["last_t"] > self.max_age]:
+            del self.tracks[tid]
+        return out
+
+    def needs_identity(self, tr, t_now):
+        if tr["id_t"] is None:
+            return True
+        age = t_now - tr["id_t"]
+        if tr["name"] == "Unknown" or tr["dist"] > self.confident_dist:
+            return age >= self.retry_every
+        return age >= self.identity_ttl
+
+    def set_identity(self, tr, name, dist, t_now):
+        self.identify_calls += 1
+        tr["name"], tr["dist"], tr["id_t"] = name, dist, t_now
+
+    def needs_emotion(self, tr, t_now):
+        return tr["emo_t"] is None or t_now - tr["emo_t"] >= self.emotion_ttl
+
+    def set_emotion(self, tr, emotion, t_now):
+        self.emotion_calls += 1
+        tr["emotion"], tr["emo_t"] = emotion, t_now
@@ -1,38 +1,70 @@
 import cv2
 import numpy as np
-import os
-import urllib.request
+
+import model_registry as registry
+from frame_pipeline import FramePipeline
+from model_store import ModelStore
+
+MODEL_FILES = ("deploy.prototxt", "res10_300x300_ssd_iter_140000.caffemodel")
 
 def download_models(model_dir="models"):
     """
-    Download model DNN (Caffe) untuk deteksi wajah
-    jika belum tersedia di folder.
+    Pastikan model DNN (Caffe) untuk deteksi wajah tersedia dan utuh.
+    Return dict nama file -> path terverifikasi di cache model_store.
+
+    model_dir dipakai sebagai sumber lokal (deploy.prototxt ikut di repo);
+    file lain diambil dari cache / MODEL_MIRROR / download yang bisa dilanjutkan.
     """
-    os.makedirs(model_dir, exist_ok=True)
+    store = ModelStore(sources=[model_dir])
+    return {name: store.resolve(name) for name in MODEL_FILES}
 
-    files = {
-        "deploy.prototxt": "https://raw.githubusercontent.com/opencv/opencv/master/samples/dnn/face_detector/deploy.prototxt",
-        "res10_300x300_ssd_iter_140000.caffemodel": "https://github.com/opencv/opencv_3rdparty/raw/dnn_samples_face_detector_20170830/res10_300x300_ssd_iter_140000.caffemodel"
-    }
 
-    for filename, url in files.items():
-        path = os.path.join(model_dir, filename)
-        if not os.path.exists(path):
-            print(f"[INFO] Downloading {filename} ...")
-            urllib.request.urlretrieve(url, path)
-            print(f"[OK] {filename} saved to {path}")
-        else:
-            print(f"[SKIP] {filename} already exists.")
+# Hasil deteksi ringkas: box (startX, startY, endX, endY) piksel + score
+DETECTION_DTYPE = np.dtype([("box", np.int32, (4,)), ("score", np.float32)])
 
 
-def main(camera_index=0):
-    # Pastikan model sudah ada
-    download_models("models")
+def postprocess_detections(detections, w, h, conf=0.5, nms=0.4, image_id=None):
+    """
+    Post-processing output SSD (1, 1, N, 7) dalam satu kali jalan vektor:
+    threshold, skala ke ukuran frame, clip ke batas frame, lalu NMS.
+
+    image_id dipakai jika output berasal dari batch (kolom 0 = index gambar).
+    Return structured array DETECTION_DTYPE, urut dari score tertinggi.
+    """
+    rows = detections.reshape(-1, 7)
+    if image_id is not None:
+        rows = rows[rows[:, 0] == image_id]
+    rows = rows[rows[:, 2] > conf]
+
+    boxes = np.clip(rows[:, 3:7], 0.0, 1.0) * np.array([w - 1, h - 1, w - 1, h - 1], dtype=np.float32)
+    scores = rows[:, 2]
+    valid = (boxes[:, 2] > boxes[:, 0]) & (boxes[:, 3] > boxes[:, 1])
+    boxes, scores = boxes[valid], scores[valid]
+
+    if len(boxes) > 1 and nms is not None:
+        xywh = np.hstack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+        keep = np.asarray(cv2.dnn.NMSBoxes(xywh.tolist(), scores.tolist(), conf, nms), dtype=np.int64).reshape(-1)
+    else:
+        keep = np.arange(len(boxes))
+    keep = keep[np.argsort(-scores[keep], kind="stable")]
+
+    out = np.empty(len(keep), dtype=DETECTION_DTYPE)
+    out["box"] = boxes[keep].astype(np.int32)
+    out["score"] = scores[keep]
+    return out
+
+
+def load_face_net(model_dir="models"):
+    # Pastikan model sudah ada (cache terverifikasi, bukan cek os.path.exists)
+    paths = download_models(model_dir)
 
     # Load model
-    proto = "models/deploy.prototxt"
-    model = "models/res10_300x300_ssd_iter_140000.caffemodel"
-    net = cv2.dnn.readNetFromCaffe(proto, model)
+    return cv2.dnn.readNetFromCaffe(paths["deploy.prototxt"],
+                                    paths["res10_300x300_ssd_iter_140000.caffemodel"])
+
+
+def main(camera_index=0):
+    net = registry.res10_net("models")
 
     cap = cv2.VideoCapture(camera_index)
 
@@ -42,40 +74,27 @@ def main(camera_index=0):
 
     print("[INFO] Tekan 'q' untuk keluar.")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[ERROR] Gagal membaca frame dari kamera")
-            break
-
+    def process(frame):
         (h, w) = frame.shape[:2]
         blob = cv2.dnn.blobFromImage(cv2.resize(frame, (300, 300)), 1.0,
                                      (300, 300), (104.0, 177.0, 123.0))
         net.setInput(blob)
-        detections = net.forward()
-
-        for i in range(0, detections.shape[2]):
-            confidence = detections[0, 0, i, 2]
-
-            if confidence > 0.5:
-                box = detections[0, 0, i, 3:7] * np.array([w, h, w, h])
-                (startX, startY, endX, endY) = box.astype("int")
-
-                text = f"{confidence*100:.2f}%"
-                y = startY - 10 if startY - 10 > 10 else startY + 10
-
-                cv2.rectangle(frame, (startX, startY), (endX, endY),
-                              (0, 255, 0), 2)
-                cv2.putText(frame, text, (startX, y),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 0), 2)
-
-        cv2.imshow("Real-Time Face Detection (DNN)", frame)
-
-        if cv2.waitKey(1) & 0xFF == ord("q"):
-            break
-
-    cap.release()
-    cv2.destroyAllWindows()
+        return postprocess_detections(net.forward(), w, h, conf=0.5)
+
+    def render(frame, faces):
+        for (startX, startY, endX, endY), confidence in faces:
+            text = f"{confidence*100:.2f}%"
+            y = startY - 10 if startY - 10 > 10 else startY + 10
+
+            cv2.rectangle(frame, (startX, startY), (endX, endY),
+                          (0, 255, 0), 2)
+            cv2.putText(frame, text, (startX, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 255, 0), 2)
+        registry.first_frame("DNN face")
+        return frame
+
+    # net.forward() di thread process, kamera tetap dibaca di thread capture
+    FramePipeline(cap, process, render, window_name="Real-Time Face Detection (DNN)").run()
 
 if __name__ == "__main__":
     main(camera_index=0)
@@ -5,7 +5,9 @@ Realtime webcam demo with OpenCV (Python 3.13 compatible)
 Fitur:
 - Menampilkan frame dari webcam
 - Deteksi wajah (Haar Cascade) dan gambar kotak pada wajah
-- FPS counter
+- Mode detect-then-track: cascade tiap DETECT_EVERY frame, template match di antaranya
+- Cascade inkremental: hanya cari di ROI sekitar wajah sebelumnya, scan penuh berkala
+- FPS counter (render, deteksi, tracking)
 - Toggle grayscale / Canny edge
 - Tekan 's' untuk menyimpan frame, 'q' untuk keluar
 
@@ -15,10 +17,185 @@ import cv2
 import time
 import os
 
+from frame_pipeline import FramePipeline, StageStats
+
+# --- konfigurasi detect-then-track ---
+DETECT_EVERY = 5        # cascade penuh setiap K frame
+DETECT_SCALE = 0.5      # deteksi di grayscale yang di-downscale (1.0 = resolusi penuh)
+TRACK_SCALE = 0.5       # resolusi template matching
+TRACK_MIN_SCORE = 0.6   # skor matchTemplate minimum; di bawah ini deteksi ulang
+TRACK_SEARCH = 0.5      # perluasan area pencarian (relatif ukuran box)
+FULL_SCAN_EVERY = 10    # deteksi inkremental: scan full frame setiap N kali deteksi
+ROI_MARGIN = 0.5        # perluasan ROI di sekitar wajah sebelumnya (relatif ukuran box)
+SIZE_SLACK = 0.3        # rentang minSize/maxSize relatif ukuran box sebelumnya
+
 def ensure_out_dir(path="captures"):
     os.makedirs(path, exist_ok=True)
     return path
 
+class CascadeDetector:
+    """detectMultiScale pada grayscale yang di-downscale, box dipetakan balik ke resolusi asli."""
+
+    def __init__(self, cascade, scale=DETECT_SCALE, min_size=(40, 40)):
+        self.cascade = cascade
+        self.scale = scale
+        self.min_size = min_size
+
+    def _small(self, gray):
+        s = self.scale
+        return gray if s == 1.0 else cv2.resize(gray, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+
+    def _scan(self, img, min_size, max_size=None):
+        min_size = (max(1, int(min_size[0])), max(1, int(min_size[1])))
+        if max_size is None:
+            return self.cascade.detectMultiScale(img, scaleFactor=1.1, minNeighbors=5, minSize=min_size)
+        max_size = (int(max_size[0]), int(max_size[1]))
+        return self.cascade.detectMultiScale(img, scaleFactor=1.1, minNeighbors=5,
+                                             minSize=min_size, maxSize=max_size)
+
+    def detect(self, gray):
+        s = self.scale
+        faces = self._scan(self._small(gray), (self.min_size[0] * s, self.min_size[1] * s))
+        return [tuple(int(round(v / s)) for v in f) for f in faces]
+
+
+class IncrementalCascadeDetector(CascadeDetector):
+    """
+    Cascade yang hanya mencari di ROI sekitar wajah sebelumnya, dengan
+    minSize/maxSize dari skala box sebelumnya. Scan full frame hanya setiap
+    full_every kali (atau saat belum ada wajah) untuk menangkap wajah baru.
+    Output sama dengan CascadeDetector.detect: list (x, y, w, h).
+    """
+
+    def __init__(self, cascade, scale=DETECT_SCALE, min_size=(40, 40), full_every=FULL_SCAN_EVERY,
+                 margin=ROI_MARGIN, slack=SIZE_SLACK):
+        super().__init__(cascade, scale, min_size)
+        self.full_every = max(1, full_every)
+        self.margin = margin
+        self.slack = slack
+        self.prev = []
+        self.calls = 0
+        self.full_scans = 0
+
+    def detect(self, gray):
+        self.calls += 1
+        if not self.prev or self.calls % self.full_every == 0:
+            self.full_scans += 1
+            self.prev = super().detect(gray)
+            return self.prev
+
+        s = self.scale
+        small = self._small(gray)
+        sh, sw = small.shape[:2]
+        found = []
+        for (x, y, w, h) in self.prev:
+            x, y, w, h = x * s, y * s, w * s, h * s
+            mx, my = w * self.margin, h * self.margin
+            x0, y0 = max(0, int(x - mx)), max(0, int(y - my))
+            x1, y1 = min(sw, int(x + w + mx)), min(sh, int(y + h + my))
+            lo = (max(self.min_size[0] * s, w * (1 - self.slack)), max(self.min_size[1] * s, h * (1 - self.slack)))
+            hi = (w * (1 + self.slack) + 1, h * (1 + self.slack) + 1)
+            for (fx, fy, fw, fh) in self._scan(small[y0:y1, x0:x1], lo, hi):
+                found.append((int(round((x0 + fx) / s)), int(round((y0 + fy) / s)),
+                              int(round(fw / s)), int(round(fh / s))))
+        self.prev = _dedupe(found)
+        return self.prev
+
+
+def _dedupe(boxes, thresh=0.5):
+    """Buang box duplikat dari ROI yang saling tumpang tindih (IoU > thresh)."""
+    kept = []
+    for b in sorted(boxes, key=lambda b: b[2] * b[3], reverse=True):
+        bx, by, bw, bh = b
+        dup = False
+        for kx, ky, kw, kh in kept:
+            iw = min(bx + bw, kx + kw) - max(bx, kx)
+            ih = min(by + bh, ky + kh) - max(by, ky)
+            if iw > 0 and ih > 0 and iw * ih > thresh * (bw * bh + kw * kh - iw * ih):
+                dup = True
+                break
+        if not dup:
+            kept.append(b)
+    return kept
+
+
+class FaceTracker:
+    """
+    Detect-then-track: detektor penuh dijalankan setiap detect_every frame atau
+    saat skor tracking turun; di antaranya wajah diikuti dengan template match
+    pada ROI kecil (downscale) di sekitar posisi sebelumnya.
+    """
+
+    def __init__(self, detector, detect_every=DETECT_EVERY, track_scale=TRACK_SCALE,
+                 min_score=TRACK_MIN_SCORE, search=TRACK_SEARCH):
+        self.detector = detector
+        self.detect_every = max(1, detect_every)
+        self.track_scale = track_scale
+        self.min_score = min_score
+        self.search = search
+        self.faces = []
+        self.templates = []
+        self.since_detect = self.detect_every  # frame pertama langsung deteksi
+        self.detect_stats = StageStats()
+        self.track_stats = StageStats()
+
+    def _small(self, gray):
+        s = self.track_scale
+        return gray if s == 1.0 else cv2.resize(gray, None, fx=s, fy=s, interpolation=cv2.INTER_AREA)
+
+    def _redetect(self, gray):
+        t0 = time.perf_counter()
+        self.faces = self.detector.detect(gray)
+        small = self._small(gray)
+        s = self.track_scale
+        self.templates = [small[int(y*s):int((y+h)*s), int(x*s):int((x+w)*s)].copy()
+                          for (x, y, w, h) in self.faces]
+        self.since_detect = 0
+        self.detect_stats.add(time.perf_counter() - t0)
+
+    def _track(self, gray):
+        """Template match tiap wajah; return False jika ada yang hilang."""
+        if not self.faces:
+            return True
+        t0 = time.perf_counter()
+        small = self._small(gray)
+        sh, sw = small.shape[:2]
+        s = self.track_scale
+        tracked = []
+        ok = True
+        for (x, y, w, h), tpl in zip(self.faces, self.templates):
+            th, tw = tpl.shape[:2]
+            if th < 4 or tw < 4:
+                ok = False
+                continue
+            mx, my = int(w * s * self.search), int(h * s * self.search)
+            x0, y0 = max(0, int(x * s) - mx), max(0, int(y * s) - my)
+            x1, y1 = min(sw, int((x + w) * s) + mx), min(sh, int((y + h) * s) + my)
+            roi = small[y0:y1, x0:x1]
+            if roi.shape[0] < th or roi.shape[1] < tw:
+                ok = False
+                continue
+            _, score, _, (bx, by) = cv2.minMaxLoc(cv2.matchTemplate(roi, tpl, cv2.TM_CCOEFF_NORMED))
+            if score < self.min_score:
+                ok = False
+                continue
+            tracked.append((int((x0 + bx) / s), int((y0 + by) / s), w, h))
+        self.faces = tracked
+        self.track_stats.add(time.perf_counter() - t0)
+        return ok
+
+    def update(self, gray):
+        self.since_detect += 1
+        if self.since_detect >= self.detect_every:
+            # posisi hasil tracking lebih baru; pakai sebagai ROI detektor inkremental
+            if self.faces and hasattr(self.detector, "prev"):
+                self.detector.prev = list(self.faces)
+            self._redetect(gray)
+        elif not self._track(gray):
+            self._redetect(gray)
+        return self.faces
+
+
 def main(camera_index=0):
     out_dir = ensure_out_dir()
 
@@ -35,29 +212,21 @@ def main(camera_index=0):
     if face_cascade.empty():
         print("[WARNING] Gagal load haarcascade. Deteksi wajah tidak akan bekerja.")
 
-    prev_time = time.time()
-    fps = 0.0
-    show_gray = False
-    show_canny = False
-    frame_counter = 0
+    tracker = FaceTracker(IncrementalCascadeDetector(face_cascade))
+    state = {"show_gray": False, "show_canny": False, "display": None}
 
     print("Tekan 'q' untuk keluar, 's' untuk simpan frame, 'g' toggle grayscale, 'c' toggle Canny edges.")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("[ERROR] Gagal membaca frame dari kamera. Mengakhiri...")
-            break
-
-        frame_counter += 1
-
-        # Hitung FPS sederhana (running)
-        curr_time = time.time()
-        dt = curr_time - prev_time
-        if dt >= 0.2:
-            fps = 1.0 / dt
-            prev_time = curr_time
+    def process(frame):
+        # Deteksi wajah (selalu gunakan frame berwarna abu-abu untuk deteksi)
+        try:
+            gray_for_detect = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            return tracker.update(gray_for_detect)
+        except Exception:
+            return []
 
+    def render(frame, faces):
+        show_gray, show_canny = state["show_gray"], state["show_canny"]
         display = frame.copy()
 
         # Pilihan mode tampilan
@@ -69,42 +238,39 @@ def main(camera_index=0):
             edges = cv2.Canny(gray, 50, 150)
             display = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
 
-        # Deteksi wajah (selalu gunakan frame berwarna abu-abu untuk deteksi)
-        try:
-            gray_for_detect = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            faces = face_cascade.detectMultiScale(gray_for_detect, scaleFactor=1.1, minNeighbors=5, minSize=(40,40))
-        except Exception:
-            faces = []
-
         # Gambar kotak pada wajah
         for (x, y, w, h) in faces:
             cv2.rectangle(display, (x,y), (x+w, y+h), (0,255,0), 2)
             cv2.putText(display, "Wajah", (x, y-8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,255,0), 2)
 
         # Overlay teks FPS dan instruksi
-        cv2.putText(display, f"FPS: {fps:.1f}", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,255), 2)
+        cv2.putText(display, f"FPS: {pipeline.stats.fps():.1f}", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,255,255), 2)
         mode = "GRAY" if show_gray else "COLOR"
         if show_canny:
             mode = "CANNY"
         cv2.putText(display, f"Mode: {mode}", (10, 55), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255,255,0), 2)
+        det, trk = tracker.detect_stats, tracker.track_stats
+        cv2.putText(display, f"Detect: {det.fps:.1f}/s ({det.latency_ms:.0f}ms)  Track: {trk.fps:.1f}/s ({trk.latency_ms:.0f}ms)",
+                    (10, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,0), 1)
 
-        # Tampilkan
-        cv2.imshow("Realtime CV Demo", display)
+        state["display"] = display
+        return display
 
-        key = cv2.waitKey(1) & 0xFF
+    def on_key(key):
         if key == ord('q'):
-            break
-        elif key == ord('s'):
+            return False
+        elif key == ord('s') and state["display"] is not None:
             filename = os.path.join(out_dir, f"frame_{int(time.time())}.png")
-            cv2.imwrite(filename, display)
+            cv2.imwrite(filename, state["display"])
             print(f"[SAVED] {filename}")
         elif key == ord('g'):
-            show_gray = not show_gray
+            state["show_gray"] = not state["show_gray"]
         elif key == ord('c'):
-            show_canny = not show_canny
+            state["show_canny"] = not state["show_canny"]
 
-    cap.release()
-    cv2.destroyAllWindows()
+    # Capture, deteksi, dan tampilan berjalan di stage terpisah
+    pipeline = FramePipeline(cap, process, render, window_name="Realtime CV Demo", on_key=on_key)
+    pipeline.run()
 
 if __name__ == "__main__":
     # Jika mau gunakan camera index lain, ubah argumen di main()